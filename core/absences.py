@@ -0,0 +1,88 @@
+"""
+Close attendance days: mark everybody who was expected but not marked ABSENT.
+
+For each working day (EMS_WORKING_DAYS), the expected employees are active,
+non-staff users with a profile who had joined by then. Those with an
+Attendance row that day and those on an APPROVED leave covering it are
+removed with set operations. The whole range is loaded with three queries:
+employees, marks and leaves. The remaining employees get ABSENT rows from
+one bulk_create(ignore_conflicts=True) per day, so a mark saved meanwhile
+always wins. Days already moved to the archive are refused.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive, counters, fragments
+from .models import Attendance, Leave
+
+REMARK = 'Not marked (closed automatically)'
+
+
+def working_days(start, end):
+    weekdays = set(getattr(settings, 'EMS_WORKING_DAYS', (0, 1, 2, 3, 4)))
+    day = start
+    while day <= end:
+        if day.weekday() in weekdays:
+            yield day
+        day += timedelta(days=1)
+
+
+def missing(start, end):
+    """{day: {employee id: department id}} of employees with neither a mark nor an approved leave."""
+    days = list(working_days(start, end))
+    if not days:
+        return {}
+    employees = {
+        pk: (timezone.localdate(date_joined), department_id)
+        for pk, date_joined, department_id in User.objects.filter(is_active=True, is_staff=False, profile__isnull=False)
+        .values_list('pk', 'date_joined', 'profile__department_id')
+    }
+    marked = defaultdict(set)
+    for employee_id, day in Attendance.objects.filter(date__gte=start, date__lte=end).values_list('employee_id', 'date'):
+        marked[day].add(employee_id)
+    on_leave = defaultdict(set)
+    for employee_id, first, last in (
+        Leave.objects.filter(status='APPROVED', start_date__lte=end, end_date__gte=start)
+        .values_list('employee_id', 'start_date', 'end_date')
+    ):
+        day = max(first, start)
+        while day <= min(last, end):
+            on_leave[day].add(employee_id)
+            day += timedelta(days=1)
+
+    out = {}
+    for day in days:
+        expected = {pk for pk, (joined_on, _) in employees.items() if joined_on <= day}
+        out[day] = {pk: employees[pk][1] for pk in expected - marked[day] - on_leave[day]}
+    return out
+
+
+def close(start, end=None, dry_run=False):
+    """Insert ABSENT rows for unmarked employees from `start` to `end`. Returns {day: rows}."""
+    end = end or start
+    if archive.covers(start):
+        raise ValueError(f"Attendance up to {archive.archived_through()} is archived; start after it")
+    result = {}
+    touched = set()
+    for day, employee_ids in missing(start, end).items():
+        if dry_run or not employee_ids:
+            result[day] = len(employee_ids)
+            continue
+        with transaction.atomic():
+            Attendance.objects.bulk_create(
+                [Attendance(employee_id=pk, date=day, status='ABSENT', remarks=REMARK, department_id=dept_id)
+                 for pk, dept_id in employee_ids.items()],
+                ignore_conflicts=True,
+            )
+        result[day] = len(employee_ids)
+        touched.update(employee_ids)
+    if touched:
+        # bulk_create skips the signals that keep these current
+        counters.touch('user', 'attendance', *touched)
+        fragments.bump('attendance')
+    return result
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Department, Position, EmployeeProfile, Attendance, Leave, UserSession
+from django.utils import timezone
+from .models import (
+    Department, Position, EmployeeProfile, Attendance, ArchivedAttendance, AttendanceMonth,
+    Leave, UserSession, SessionDay, Counter, Job,
+)
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
@@ -23,6 +27,19 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_filter = ['status', 'date']
     search_fields = ['employee__username']
 
+@admin.register(ArchivedAttendance)
+class ArchivedAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'date', 'status', 'created_by']
+    list_filter = ['status']
+    date_hierarchy = 'date'
+    search_fields = ['employee__username']
+
+@admin.register(AttendanceMonth)
+class AttendanceMonthAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'month', 'present', 'absent', 'late']
+    date_hierarchy = 'month'
+    search_fields = ['employee__username']
+
 @admin.register(Leave)
 class LeaveAdmin(admin.ModelAdmin):
     list_display = ['employee', 'start_date', 'end_date', 'status', 'applied_at', 'decided_by']
@@ -39,3 +56,31 @@ class UserSessionAdmin(admin.ModelAdmin):
     def session_duration_human(self, obj):
         return obj.duration_human
     session_duration_human.short_description = "Duration"
+
+
+@admin.register(SessionDay)
+class SessionDayAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'sessions', 'seconds', 'first_login', 'last_logout')
+    date_hierarchy = 'day'
+    search_fields = ('user__username',)
+
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ('key', 'value')
+    search_fields = ('key',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'started_at', 'finished_at', 'worker')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'worker', 'heartbeat_at')
+    actions = ['retry']
+
+    @admin.action(description="Run selected jobs again")
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status='RUNNING').update(
+            status='PENDING', attempts=0, error='', run_at=timezone.now(), worker='',
+        )
+        self.message_user(request, f"{updated} job(s) queued again.")
@@ -0,0 +1,234 @@
+"""
+JSON API resources for the mobile app.
+
+Each resource maps public field names onto ORM paths. A request's ?fields=
+list becomes one .values() call, so unrequested columns and joins are never
+loaded. Listing reuses the export querysets for date/department filtering
+and core.pagination for cursors.
+"""
+import json
+from functools import wraps
+
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+
+from . import archive, dates
+from .exports import ARCHIVED, EXPORTS
+from .models import Attendance, EmployeeProfile
+from .pagination import keyset_paginate
+from .roles import get_roles
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _profiles(start, end, department_id):
+    qs = EmployeeProfile.objects.all()
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    return qs
+
+
+class Resource:
+    def __init__(self, build, user_field, ordering, fields, default_fields, archive=None):
+        self.build = build              # (start, end, department_id) -> queryset
+        self.archive = archive          # same, over the archive table if the kind has one
+        self.user_field = user_field    # FK to the User the row belongs to
+        self.ordering = ordering
+        self.fields = fields            # public name -> ORM path
+        self.default_fields = default_fields
+
+
+RESOURCES = {
+    'attendance': Resource(EXPORTS['attendance'][0], 'employee', ['-date'], {
+        'id': 'id',
+        'employee': 'employee_id',
+        'username': 'employee__username',
+        'date': 'date',
+        'status': 'status',
+        'remarks': 'remarks',
+        'marked_by': 'created_by_id',
+        'updated_at': 'updated_at',
+    }, ('id', 'employee', 'date', 'status'), archive=ARCHIVED['attendance']),
+    'leaves': Resource(EXPORTS['leaves'][0], 'employee', ['-applied_at'], {
+        'id': 'id',
+        'employee': 'employee_id',
+        'username': 'employee__username',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'reason': 'reason',
+        'status': 'status',
+        'applied_at': 'applied_at',
+        'decided_by': 'decided_by_id',
+        'decided_at': 'decided_at',
+        'updated_at': 'updated_at',
+    }, ('id', 'employee', 'start_date', 'end_date', 'status')),
+    'profiles': Resource(_profiles, 'user', ['id'], {
+        'id': 'id',
+        'user': 'user_id',
+        'username': 'user__username',
+        'first_name': 'user__first_name',
+        'last_name': 'user__last_name',
+        'email': 'user__email',
+        'department': 'department_id',
+        'department_name': 'department__name',
+        'position': 'position_id',
+        'position_name': 'position__name',
+        'phone': 'phone',
+        'updated_at': 'updated_at',
+    }, ('id', 'user', 'username', 'department', 'position')),
+    'sessions': Resource(EXPORTS['sessions'][0], 'user', ['-login_time'], {
+        'id': 'id',
+        'user': 'user_id',
+        'username': 'user__username',
+        'login_time': 'login_time',
+        'logout_time': 'logout_time',
+    }, ('id', 'user', 'login_time', 'logout_time')),
+}
+
+
+def json_response(data, status=200):
+    # no whitespace between tokens: the app pays for every byte over mobile data
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder,
+                        json_dumps_params={'separators': (',', ':')})
+
+
+def read_json(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('request body is not valid JSON')
+    if not isinstance(data, dict):
+        raise ApiError('request body must be a JSON object')
+    return data
+
+
+def _requested_fields(resource, raw):
+    if not raw:
+        return list(resource.default_fields)
+    names = [n for n in (part.strip() for part in raw.split(',')) if n]
+    unknown = [n for n in names if n not in resource.fields]
+    if unknown:
+        raise ApiError(f"unknown field(s): {', '.join(unknown)}; choose from {', '.join(resource.fields)}")
+    return list(dict.fromkeys(names))
+
+
+def date_window(request):
+    """(start, end) from ?start= and ?end=, either may be None."""
+    bad = dates.invalid(request.GET, 'start', 'end')
+    if bad:
+        raise ApiError(f"invalid date in {', '.join(bad)}; use YYYY-MM-DD")
+    return dates.param(request.GET, 'start'), dates.param(request.GET, 'end')
+
+
+def scoped_queryset(request, resource, build=None, window=None):
+    """
+    Rows the viewer may see: admins everything, managers their department,
+    everyone else (or anyone passing ?mine=1) only their own rows.
+    """
+    build = build or resource.build
+    start, end = window or date_window(request)
+    roles = get_roles(request)
+    if request.GET.get('mine') or not roles.has_any('ADMIN', 'MANAGER'):
+        return build(start, end, None).filter(**{resource.user_field: request.user})
+    if roles.is_manager:
+        dept_id = roles.scope_department_id
+        if not dept_id:
+            return build(start, end, None).none()
+    else:
+        dept_id = request.GET.get('department')
+        dept_id = int(dept_id) if dept_id and dept_id.isdigit() else None
+    return build(start, end, dept_id)
+
+
+def list_page(request, resource):
+    """One page of `resource` as {'results': [...], 'next': cursor, 'previous': cursor}."""
+    names = _requested_fields(resource, request.GET.get('fields'))
+    paths = [resource.fields[n] for n in names]
+    # the sort key has to be in each row for the cursor, even if not asked for
+    sort_paths = [f.lstrip('-') for f in resource.ordering] + ['id']
+    status = request.GET.get('status')
+    window = date_window(request)
+
+    def rows(build=None):
+        qs = scoped_queryset(request, resource, build, window)
+        if status and 'status' in resource.fields:
+            qs = qs.filter(status=status.upper())
+        return qs.values(*dict.fromkeys(paths + sort_paths))
+
+    fallback = None
+    if resource.archive and archive.covers(window[0]):
+        fallback = rows(resource.archive)
+    page = keyset_paginate(request, rows(), resource.ordering, fallback=fallback)
+    return {
+        'results': [{n: row[p] for n, p in zip(names, paths)} for row in page],
+        'next': page.next_cursor,
+        'previous': page.prev_cursor,
+    }
+
+
+def attendance_records(request, records):
+    """
+    Validate bulk attendance records against the viewer's scope and return
+    unsaved Attendance objects plus the indexes of rejected records. Records
+    for days already moved to the archive are rejected too.
+    """
+    if not isinstance(records, list) or not records:
+        raise ApiError("'records' must be a non-empty list")
+    statuses = {code for code, _ in Attendance.STATUS_CHOICES}
+    roles = get_roles(request)
+    if roles.is_manager and not roles.scope_department_id:
+        raise PermissionDenied
+    scope_dept_id = roles.scope_department_id
+    archived_through = archive.archived_through()
+
+    parsed = []
+    for i, rec in enumerate(records):
+        if not isinstance(rec, dict):
+            parsed.append(None)
+            continue
+        emp = rec.get('employee')
+        if isinstance(emp, bool):
+            # bool is an int subclass: true/false would mean employees 1 and 0
+            raise ApiError(f"records[{i}]: 'employee' must be an employee id, not {str(emp).lower()}")
+        day = dates.parse(str(rec.get('date') or ''))
+        status = str(rec.get('status') or 'PRESENT').upper()
+        remarks = str(rec.get('remarks') or '')[:255]
+        ok = (isinstance(emp, int) and day is not None and status in statuses
+              and (archived_through is None or day > archived_through))
+        parsed.append((emp, day, status, remarks) if ok else None)
+
+    employees = User.objects.filter(pk__in={p[0] for p in parsed if p}, is_active=True)
+    if scope_dept_id:
+        employees = employees.filter(profile__department_id=scope_dept_id)
+    allowed = dict(employees.values_list('pk', 'profile__department_id'))
+
+    rows, rejected = {}, []
+    for i, p in enumerate(parsed):
+        if p is None or p[0] not in allowed:
+            rejected.append(i)
+            continue
+        # a later record for the same employee and day replaces the earlier one
+        rows[p[0], p[1]] = Attendance(employee_id=p[0], date=p[1], status=p[2], remarks=p[3],
+                                      created_by=request.user, department_id=allowed[p[0]])
+    return list(rows.values()), rejected
+
+
+def api_endpoint(view_func):
+    """Answer with JSON errors instead of login redirects and HTML error pages."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response({'error': 'authentication required'}, status=401)
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as exc:
+            return json_response({'error': str(exc)}, status=exc.status)
+        except PermissionDenied:
+            return json_response({'error': 'permission denied'}, status=403)
+    return _wrapped_view
@@ -6,3 +6,4 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals  # 👈 very important
+        import core.tasks  # registers the built-in job tasks
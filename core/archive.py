@@ -0,0 +1,107 @@
+"""
+Attendance archive.
+
+archive() moves whole months older than the retention window from
+Attendance into ArchivedAttendance, keeping ids so (date, id) cursors stay
+unique across both tables, and recomputes the AttendanceMonth summaries of
+those months. Readers call covers(start) to learn whether a date range
+reaches into the archive and only then query it.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncMonth
+
+from . import counters
+from .models import ArchivedAttendance, Attendance, AttendanceMonth
+
+_THROUGH_KEY = 'ems:archive:through'
+COLUMNS = ('id', 'employee_id', 'date', 'status', 'remarks', 'created_by_id', 'updated_at', 'department_id')
+
+
+def cutoff_for(months, today):
+    """First day of the oldest month kept in the hot table."""
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archived_through():
+    """Latest archived date, or None while the archive is empty."""
+    found = cache.get(_THROUGH_KEY)
+    if found is None:
+        found = ArchivedAttendance.objects.aggregate(last=Max('date'))['last'] or ''
+        cache.set(_THROUGH_KEY, found, None)
+    return found or None
+
+
+def covers(start):
+    """Whether rows from `start` onwards (None: all history) may live in the archive."""
+    through = archived_through()
+    return through is not None and (start is None or start <= through)
+
+
+def _move(ids):
+    rows = list(Attendance.objects.filter(pk__in=ids).values(*COLUMNS))
+    keys = {(row['employee_id'], row['date']) for row in rows}
+    archived = ArchivedAttendance.objects.filter(
+        employee_id__in={e for e, _ in keys},
+        date__range=(min(d for _, d in keys), max(d for _, d in keys)),
+    ).values_list('employee_id', 'date')
+    clashing = {e for e, d in archived if (e, d) in keys}
+    ArchivedAttendance.objects.bulk_create(
+        [ArchivedAttendance(**row) for row in rows],
+        # a row backdated after its month was archived replaces the archived one
+        update_conflicts=True, unique_fields=['employee', 'date'],
+        update_fields=['status', 'remarks', 'created_by', 'updated_at', 'department'],
+    )
+    # a replacement leaves one row where there were two: only those employees' totals drop
+    counters.touch('user', 'attendance', *clashing)
+    # plain DELETE: no per-row signals, moved rows keep their totals (see core.counters)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {Attendance._meta.db_table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids,
+        )
+
+
+def summarize(start, end):
+    """Rebuild AttendanceMonth rows for archived dates in [start, end)."""
+    counts = (
+        ArchivedAttendance.objects.filter(date__gte=start, date__lt=end)
+        .annotate(month=TruncMonth('date')).order_by()
+        .values('employee_id', 'month')
+        .annotate(
+            present=Count('pk', filter=Q(status='PRESENT')),
+            absent=Count('pk', filter=Q(status='ABSENT')),
+            late=Count('pk', filter=Q(status='LATE')),
+        )
+    )
+    AttendanceMonth.objects.bulk_create(
+        [AttendanceMonth(**row) for row in counts],
+        update_conflicts=True, unique_fields=['employee', 'month'],
+        update_fields=['present', 'absent', 'late'],
+    )
+
+
+def archive(cutoff, batch_size=5000):
+    """Move attendance dated before `cutoff` into the archive. Returns the rows moved."""
+    moved = 0
+    oldest = None
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Attendance.objects.filter(date__lt=cutoff).order_by('date', 'id')
+                .values_list('id', 'date')[:batch_size]
+            )
+            if not batch:
+                break
+            _move([pk for pk, _ in batch])
+        if oldest is None:
+            oldest = batch[0][1]  # batches run oldest first
+        moved += len(batch)
+    if moved:
+        with transaction.atomic():
+            summarize(oldest.replace(day=1), cutoff)
+        cache.delete(_THROUGH_KEY)
+    return moved
@@ -0,0 +1,68 @@
+"""
+Lookups behind the lazy selects in core.forms.
+
+Each source takes (request, q, limit) and returns [(id, label)]. Employees go
+through the FTS5 prefix index (core.search), ranked by bm25. Positions are
+narrowed by the department chosen in the same form.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from . import search
+from .models import Department, Position
+from .roles import get_roles
+
+
+def limit_for(request):
+    default = getattr(settings, 'EMS_AUTOCOMPLETE_LIMIT', 20)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, 50))
+
+
+def employee_label(user):
+    full = user.get_full_name()
+    return f'{full} ({user.username})' if full else user.username
+
+
+def _employees(request, q, limit):
+    users = User.objects.filter(is_active=True)
+    scope_dept_id = get_roles(request).scope_department_id
+    if scope_dept_id:
+        users = users.filter(profile__department_id=scope_dept_id)
+    ordering = ['first_name', 'last_name', 'username']
+    if q:
+        users, ordering = search.search_users(users, q)
+    users = users.only('id', 'username', 'first_name', 'last_name').order_by(*ordering, 'pk')
+    return [(u.pk, employee_label(u)) for u in users[:limit]]
+
+
+def _departments(request, q, limit):
+    departments = Department.objects.all()
+    if q:
+        departments = departments.filter(name__istartswith=q)
+    return list(departments.values_list('pk', 'name')[:limit])
+
+
+def _positions(request, q, limit):
+    positions = Position.objects.select_related('department')
+    department = request.GET.get('department')
+    if department and department.isdigit():
+        positions = positions.filter(department_id=department)
+    if q:
+        positions = positions.filter(name__istartswith=q)
+    return [(p.pk, str(p)) for p in positions[:limit]]
+
+
+SOURCES = {
+    'employees': _employees,
+    'departments': _departments,
+    'positions': _positions,
+}
+
+
+def lookup(request, kind):
+    q = request.GET.get('q', '').strip()
+    return [{'id': pk, 'text': label} for pk, label in SOURCES[kind](request, q, limit_for(request))]
@@ -0,0 +1,32 @@
+"""
+SQLite backend with a configurable transaction mode.
+
+Django's sqlite3 backend opens every atomic() block with a plain (DEFERRED)
+BEGIN. Two workers that both read and then write inside a transaction can
+then deadlock on the lock upgrade, and SQLite fails one of them immediately
+with "database is locked" regardless of busy_timeout. BEGIN IMMEDIATE takes
+the write lock up front, so writers queue on busy_timeout instead.
+
+    'OPTIONS': {'transaction_mode': 'IMMEDIATE'}
+
+mirrors the option Django 5.1 added to the stock backend.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        mode = (kwargs.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES transaction_mode must be one of {', '.join(TRANSACTION_MODES)}."
+            )
+        self.transaction_mode = mode
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f"BEGIN {getattr(self, 'transaction_mode', 'DEFERRED')}")
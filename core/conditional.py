@@ -0,0 +1,45 @@
+"""
+Conditional GET for list views.
+
+The validator for a list is the row count and MAX(updated_at) of the rows
+the viewer may see, plus who is looking. One aggregate query decides between
+a 304 and a full render; the count catches deletes that MAX() cannot.
+"""
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .roles import get_roles
+
+
+def _state(request, scope):
+    state = getattr(request, '_ems_list_state', None)
+    if state is None:
+        if len(get_messages(request)):
+            # a flash message must be rendered, never answer 304
+            state = (None, None)
+        else:
+            agg = scope(request).order_by().aggregate(rows=Count('pk'), last=Max('updated_at'))
+            roles = get_roles(request)
+            raw = f"{agg['rows']}|{agg['last']}|{request.user.pk}|{roles.role}|{roles.scope_department_id}"
+            state = (hashlib.md5(raw.encode()).hexdigest(), agg['last'])
+        request._ems_list_state = state
+    return state
+
+
+def conditional_list(scope):
+    """
+    Decorate a list view with ETag/Last-Modified handling. `scope(request)`
+    returns the queryset whose rows the page shows (filters applied, no paging).
+    """
+    def decorator(view_func):
+        view = condition(
+            etag_func=lambda request, *args, **kwargs: _state(request, scope)[0],
+            last_modified_func=lambda request, *args, **kwargs: _state(request, scope)[1],
+        )(view_func)
+        # browsers must revalidate on every load, and never share the page
+        return cache_control(private=True, no_cache=True)(view)
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Dashboard counters kept in the Counter table.
+
+Keys are either a global name ('employees') or '<scope>:<id>:<name>'
+('dept:3:employees', 'user:7:attendance'). Writes mark keys dirty; the dirty
+keys are recounted with one grouped query per counter when the surrounding
+transaction commits, so a cascade delete of 1000 rows costs one recount.
+"""
+import threading
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+
+from .models import ArchivedAttendance, Attendance, Counter, Department, EmployeeProfile, Leave
+
+
+def _grouped(qs, field, ids=None):
+    if ids is not None:
+        qs = qs.filter(**{f'{field}__in': ids})
+    return dict(qs.order_by().values_list(field).annotate(n=Count('pk')))
+
+
+def _attendance(ids=None):
+    # archived rows still count: archiving must not move anybody's total
+    counts = _grouped(Attendance.objects.all(), 'employee_id', ids)
+    for pk, n in _grouped(ArchivedAttendance.objects.all(), 'employee_id', ids).items():
+        counts[pk] = counts.get(pk, 0) + n
+    return counts
+
+
+GLOBAL = {
+    'employees': lambda: User.objects.filter(is_staff=False).count(),
+    'departments': lambda: Department.objects.count(),
+    'leaves_pending': lambda: Leave.objects.filter(status='PENDING').count(),
+}
+
+SCOPED = {
+    ('dept', 'employees'): lambda ids=None: _grouped(EmployeeProfile.objects.all(), 'department_id', ids),
+    ('user', 'attendance'): _attendance,
+    ('user', 'leaves_pending'): lambda ids=None: _grouped(Leave.objects.filter(status='PENDING'), 'employee_id', ids),
+}
+
+
+def key(scope, name, pk=None):
+    return name if scope == 'global' else f'{scope}:{pk}:{name}'
+
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'keys'):
+        _local.keys = set()
+    return _local.keys
+
+
+def touch(scope, name, *ids):
+    """Mark counters dirty; they are recounted once the current transaction commits."""
+    pending = _pending()
+    if scope == 'global':
+        pending.add(('global', name, None))
+    else:
+        pending.update((scope, name, pk) for pk in ids if pk is not None)
+    transaction.on_commit(flush)
+
+
+def flush():
+    pending = _pending()
+    if not pending:
+        return
+    items = list(pending)
+    pending.clear()
+
+    values = {}
+    scoped = defaultdict(set)
+    for scope, name, pk in items:
+        if scope == 'global':
+            values[name] = GLOBAL[name]()
+        else:
+            scoped[(scope, name)].add(pk)
+    for (scope, name), ids in scoped.items():
+        counts = SCOPED[(scope, name)](ids)
+        for pk in ids:
+            values[key(scope, name, pk)] = counts.get(pk, 0)
+    _write(values)
+
+
+def _write(values):
+    Counter.objects.bulk_create(
+        [Counter(key=k, value=v) for k, v in values.items()],
+        update_conflicts=True, unique_fields=['key'], update_fields=['value'],
+    )
+
+
+def rebuild():
+    """Recompute every counter from scratch. Returns the number of keys written."""
+    values = {name: fn() for name, fn in GLOBAL.items()}
+    for (scope, name), fn in SCOPED.items():
+        values.update({key(scope, name, pk): n for pk, n in fn().items() if pk is not None})
+    with transaction.atomic():
+        Counter.objects.all().delete()
+        _write(values)
+    return len(values)
+
+
+def read(*keys):
+    """Fetch counters in one query; missing scoped keys are zero."""
+    wanted = set(keys) | set(GLOBAL)
+    values = dict(Counter.objects.filter(key__in=wanted).values_list('key', 'value'))
+    if not set(GLOBAL) <= values.keys():
+        # table was never built (fresh install or wiped): seed it once
+        rebuild()
+        values = dict(Counter.objects.filter(key__in=wanted).values_list('key', 'value'))
+    return {k: values.get(k, 0) for k in keys}
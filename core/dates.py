@@ -0,0 +1,26 @@
+"""
+Dates taken from request parameters.
+
+parse_date() returns None for malformed strings but raises ValueError for
+well-formed impossible ones (2026-02-30, 2026-13-01); these helpers treat both
+the same so a typo in a URL is never a 500.
+"""
+from django.utils.dateparse import parse_date
+
+
+def parse(value):
+    """The date in a YYYY-MM-DD string, or None if it is empty, malformed or impossible."""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def param(params, name, default=None):
+    """The date in params[name], or `default` when it is missing or not a real date."""
+    return parse(params.get(name)) or default
+
+
+def invalid(params, *names):
+    """The names among `names` that are given in params but are not real dates."""
+    return [name for name in names if params.get(name) and parse(params.get(name)) is None]
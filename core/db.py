@@ -0,0 +1,25 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created hook applying settings.EMS_SQLITE_PRAGMAS to new SQLite connections."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'EMS_SQLITE_PRAGMAS', {})
+    if not pragmas or connection.is_in_memory_db():
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def batches(iterable, size):
+    """Lists of up to `size` items from `iterable`, for bulk writes that must not hold it all in memory."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
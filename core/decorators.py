@@ -1,15 +1,52 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
+
+from .roles import get_roles
 
 def group_required(*group_names):
+    def check(request):
+        if request.user.is_superuser:
+            return
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        if not get_roles(request).has_any(*group_names):
+            raise PermissionDenied
+
     def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                await sync_to_async(check)(request)
+                return await view_func(request, *args, **kwargs)
+            return _wrapped_async_view
+
         def _wrapped_view(request, *args, **kwargs):
-            if request.user.is_superuser:
-                return view_func(request, *args, **kwargs)
-            if not request.user.is_authenticated:
-                raise PermissionDenied
-            user_groups = set(request.user.groups.values_list('name', flat=True))
-            if user_groups.intersection(group_names):
-                return view_func(request, *args, **kwargs)
-            raise PermissionDenied
+            check(request)
+            return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
+
+def async_login_required(view_func):
+    """login_required for coroutine views; Django 4.2's decorator only wraps sync ones."""
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        # request.user loads the session and user rows, which must happen off the event loop
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+def write_transaction(view_func):
+    """Run POST requests in one atomic block (BEGIN IMMEDIATE on SQLite); GETs stay lock-free."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.method == 'POST':
+            with transaction.atomic():
+                return view_func(request, *args, **kwargs)
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
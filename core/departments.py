@@ -0,0 +1,33 @@
+"""
+The employee's department, copied onto Attendance, ArchivedAttendance and Leave.
+
+Manager scoping filters on the row's own department_id, which is indexed
+together with the list ordering, instead of joining auth_user and
+core_employeeprofile. The column is not a record of the department at the
+time of the row: it always holds the employee's current department, for
+their whole history including archived rows:
+- signals set it on save;
+- code that uses bulk_create fills it itself (of() maps employees to departments);
+- move() rewrites it when EmployeeProfile.department changes.
+"""
+from django.utils import timezone
+
+from .models import ArchivedAttendance, Attendance, EmployeeProfile, Leave
+
+
+def of(employee_ids):
+    """{employee id: department id} for employees that have a department."""
+    return dict(
+        EmployeeProfile.objects.filter(user_id__in=set(employee_ids), department__isnull=False)
+        .values_list('user_id', 'department_id')
+    )
+
+
+def move(user_id, department_id):
+    """Point every row of one employee at their new department (None: no department)."""
+    now = timezone.now()
+    for model in (Attendance, ArchivedAttendance, Leave):
+        # updated_at changes so list ETags (core.conditional) change with the rows' scope
+        model.objects.filter(employee_id=user_id).exclude(department_id=department_id).update(
+            department_id=department_id, updated_at=now,
+        )
@@ -0,0 +1,135 @@
+"""
+CSV exports streamed straight from the database cursor.
+
+Rows come from .values_list().iterator(chunk_size=...), so memory stays flat
+no matter how many rows match; the same generators back the export views
+and the export_csv management command.
+"""
+import csv
+from datetime import datetime, time, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import archive
+from .models import ArchivedAttendance, Attendance, Leave, UserSession
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _attendance(start, end, department_id, model=Attendance):
+    qs = model.objects.all()
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    return qs.order_by('date', 'id')
+
+
+def _leaves(start, end, department_id):
+    qs = Leave.objects.all()
+    # any leave overlapping [start, end]
+    if start:
+        qs = qs.filter(end_date__gte=start)
+    if end:
+        qs = qs.filter(start_date__lte=end)
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    return qs.order_by('applied_at', 'id')
+
+
+def _sessions(start, end, department_id):
+    qs = UserSession.objects.all()
+    if start:
+        qs = qs.filter(login_time__gte=_day_start(start))
+    if end:
+        qs = qs.filter(login_time__lt=_day_start(end + timedelta(days=1)))
+    if department_id:
+        qs = qs.filter(user__profile__department_id=department_id)
+    return qs.order_by('login_time', 'id')
+
+
+EXPORTS = {
+    'attendance': (_attendance, [
+        ('Date', 'date'),
+        ('Username', 'employee__username'),
+        ('First name', 'employee__first_name'),
+        ('Last name', 'employee__last_name'),
+        ('Department', 'department__name'),
+        ('Status', 'status'),
+        ('Remarks', 'remarks'),
+        ('Marked by', 'created_by__username'),
+    ]),
+    'leaves': (_leaves, [
+        ('ID', 'id'),
+        ('Username', 'employee__username'),
+        ('First name', 'employee__first_name'),
+        ('Last name', 'employee__last_name'),
+        ('Department', 'department__name'),
+        ('Start', 'start_date'),
+        ('End', 'end_date'),
+        ('Status', 'status'),
+        ('Reason', 'reason'),
+        ('Applied at', 'applied_at'),
+        ('Decided by', 'decided_by__username'),
+        ('Decided at', 'decided_at'),
+    ]),
+    'sessions': (_sessions, [
+        ('Username', 'user__username'),
+        ('First name', 'user__first_name'),
+        ('Last name', 'user__last_name'),
+        ('Department', 'user__profile__department__name'),
+        ('Login', 'login_time'),
+        ('Logout', 'logout_time'),
+    ]),
+}
+
+
+# Kinds whose older rows may have moved to an archive table with the same columns
+ARCHIVED = {
+    'attendance': partial(_attendance, model=ArchivedAttendance),
+}
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat(timespec='seconds')
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # keep spreadsheets from evaluating user-entered text as a formula
+        return "'" + value
+    return value
+
+
+def export_rows(kind, start=None, end=None, department_id=None, chunk_size=None):
+    """Yield the header then one tuple per row for `kind` ('attendance', 'leaves', 'sessions')."""
+    build, columns = EXPORTS[kind]
+    chunk_size = chunk_size or getattr(settings, 'EMS_EXPORT_CHUNK_SIZE', 2000)
+    yield [label for label, _ in columns]
+    querysets = [build(start, end, department_id)]
+    if kind in ARCHIVED and archive.covers(start):
+        # archived rows are the older ones, so they go first
+        querysets.insert(0, ARCHIVED[kind](start, end, department_id))
+    for qs in querysets:
+        qs = qs.values_list(*[field for _, field in columns])
+        for row in qs.iterator(chunk_size=chunk_size):
+            yield [_cell(v) for v in row]
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
@@ -1,7 +1,44 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.urls import reverse_lazy
+from .autocomplete import employee_label
+from .leaves import overlapping
 from .models import Department, Position, EmployeeProfile, Attendance, Leave
 
+class AutocompleteSelect(forms.Select):
+    """
+    Select that renders only the chosen option; the rest are fetched from the
+    autocomplete endpoint as the user types (static/core/autocomplete.js).
+    `depends_on` names another field whose value filters the results.
+    """
+
+    class Media:
+        js = ['core/autocomplete.js']
+
+    def __init__(self, kind, depends_on=None, attrs=None):
+        attrs = {'class': 'form-select', **(attrs or {})}
+        attrs['data-autocomplete'] = reverse_lazy('autocomplete', kwargs={'kind': kind})
+        if depends_on:
+            attrs['data-depends-on'] = depends_on
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        chosen = [v for v in value if str(v).isdigit()]
+        options = [('', field.empty_label or '')]
+        if chosen:
+            options += [(obj.pk, field.label_from_instance(obj))
+                        for obj in self.choices.queryset.filter(pk__in=chosen)]
+        full, self.choices = self.choices, options
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = full
+
+class EmployeeChoiceField(forms.ModelChoiceField):
+    def label_from_instance(self, obj):
+        return employee_label(obj)
+
 class DepartmentForm(forms.ModelForm):
     class Meta:
         model = Department
@@ -21,8 +58,10 @@ class EmployeeCreateForm(forms.ModelForm):
     password = forms.CharField(widget=forms.PasswordInput, required=True)
 
     # Profile fields
-    department = forms.ModelChoiceField(queryset=Department.objects.all(), required=False)
-    position = forms.ModelChoiceField(queryset=Position.objects.all(), required=False)
+    department = forms.ModelChoiceField(queryset=Department.objects.all(), required=False,
+                                        widget=AutocompleteSelect('departments'))
+    position = forms.ModelChoiceField(queryset=Position.objects.select_related('department'), required=False,
+                                      widget=AutocompleteSelect('positions', depends_on='department'))
     phone = forms.CharField(max_length=20, required=False)
     photo = forms.ImageField(required=False)
 
@@ -46,8 +85,10 @@ class EmployeeCreateForm(forms.ModelForm):
 
 class EmployeeUpdateForm(forms.ModelForm):
     # Profile fields
-    department = forms.ModelChoiceField(queryset=Department.objects.all(), required=False)
-    position = forms.ModelChoiceField(queryset=Position.objects.all(), required=False)
+    department = forms.ModelChoiceField(queryset=Department.objects.all(), required=False,
+                                        widget=AutocompleteSelect('departments'))
+    position = forms.ModelChoiceField(queryset=Position.objects.select_related('department'), required=False,
+                                      widget=AutocompleteSelect('positions', depends_on='department'))
     phone = forms.CharField(max_length=20, required=False)
     photo = forms.ImageField(required=False)
 
@@ -56,10 +97,19 @@ class EmployeeUpdateForm(forms.ModelForm):
         fields = ['first_name', 'last_name', 'email']
 
 class AttendanceForm(forms.ModelForm):
+    employee = EmployeeChoiceField(queryset=User.objects.all(), widget=AutocompleteSelect('employees'))
+
     class Meta:
         model = Attendance
         fields = ['employee', 'date', 'status', 'remarks']
 
+class RosterRowForm(forms.Form):
+    employee = forms.IntegerField(widget=forms.HiddenInput)
+    status = forms.ChoiceField(choices=Attendance.STATUS_CHOICES, widget=forms.Select(attrs={'class': 'form-select form-select-sm'}))
+    remarks = forms.CharField(max_length=255, required=False, widget=forms.TextInput(attrs={'class': 'form-control form-control-sm'}))
+
+RosterFormSet = forms.formset_factory(RosterRowForm, extra=0)
+
 class LeaveForm(forms.ModelForm):
     class Meta:
         model = Leave
@@ -67,3 +117,22 @@ class LeaveForm(forms.ModelForm):
         widgets = {
             'reason': forms.Textarea(attrs={'rows':3})
         }
+
+    def __init__(self, *args, employee=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.employee = employee
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get('start_date'), cleaned.get('end_date')
+        if start and end:
+            if end < start:
+                raise forms.ValidationError('End date cannot be before the start date.')
+            if self.employee is not None:
+                clash = overlapping(self.employee.pk, start, end, exclude_pk=self.instance.pk).first()
+                if clash:
+                    raise forms.ValidationError(
+                        f'This overlaps your {clash.get_status_display().lower()} leave '
+                        f'from {clash.start_date} to {clash.end_date}.'
+                    )
+        return cleaned
@@ -0,0 +1,46 @@
+"""
+Versioned keys for {% cache %} template fragments.
+
+Each model has a version stamp in the cache. Signals replace it after every
+committed write, which orphans every fragment rendered from the old state;
+nothing has to be deleted. Views build the vary-on key with fragment_key()
+and hand the template lazy data, so a cache hit never touches the database.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .roles import get_roles
+
+
+def _key(name):
+    return f'ems:version:{name}'
+
+
+def versions(*names):
+    found = cache.get_many([_key(n) for n in names])
+    missing = {_key(n): time.time_ns() for n in names if _key(n) not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[_key(n)] for n in names]
+
+
+def bump(*names):
+    """Invalidate fragments depending on `names` once the current transaction commits."""
+    def _bump():
+        # a fresh stamp rather than incr(): concurrent bumps can never collide on one value
+        cache.set_many({_key(n): time.time_ns() for n in names}, None)
+    transaction.on_commit(_bump)
+
+
+def fragment_key(request, *names, per_user=False):
+    """Vary-on value covering model versions, the viewer's scope and the query string."""
+    roles = get_roles(request)
+    parts = [str(v) for v in versions(*names)]
+    parts += [roles.role or '-', str(roles.scope_department_id or '-')]
+    if per_user:
+        parts.append(str(request.user.pk))
+    parts.append(request.GET.urlencode())
+    return '|'.join(parts)
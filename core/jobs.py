@@ -0,0 +1,326 @@
+"""
+Database-backed background jobs.
+
+Register a function with @task, queue a call with enqueue(), and keep
+`manage.py run_worker` running. Jobs are rows in the Job table, so no broker
+is needed and queued work survives restarts. A row inserted inside a
+transaction only becomes visible to workers when that transaction commits.
+
+Workers claim jobs inside one atomic() block. On SQLite that is a BEGIN
+IMMEDIATE transaction (core.backends.sqlite3), so two workers never take the
+same row; other databases use SELECT ... FOR UPDATE SKIP LOCKED. A job that
+raises is retried with exponential backoff until max_attempts.
+
+Timeouts: with processes, each job runs in its own process, which is killed
+when the job outlives its timeout; the job is then retried like a failure.
+A thread cannot be killed, so a job that overruns in a thread stays RUNNING,
+keeps its slot and is only completed or retried once it returns. A retry
+therefore never runs alongside an earlier attempt of the same job.
+
+Workers stamp heartbeat_at on the jobs they are running. Jobs whose worker
+stopped stamping (it died) are requeued after EMS_JOB_STALE_SECONDS, however
+long a healthy job may legitimately run.
+"""
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from multiprocessing import get_context
+from multiprocessing.connection import wait as wait_for_processes
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = 'PENDING', 'RUNNING', 'DONE', 'FAILED'
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable
+    max_attempts: int
+    timeout: Optional[int]
+
+
+REGISTRY = {}
+
+
+def task(name=None, max_attempts=3, timeout=None):
+    """Register a function as a job task under `name` (default: module.function)."""
+    def register(func):
+        key = name or f'{func.__module__}.{func.__name__}'
+        REGISTRY[key] = Task(key, func, max_attempts, timeout)
+        func.job_name = key
+        return func
+    return register
+
+
+def enqueue(name, *args, delay=None, run_at=None, **kwargs):
+    """Queue a call of task `name` (or a function decorated with @task). Returns the Job."""
+    name = getattr(name, 'job_name', name)
+    if name not in REGISTRY:
+        raise ValueError(f"Unknown job task {name!r}")
+    found = REGISTRY[name]
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        name=name, args=list(args), kwargs=kwargs, run_at=run_at,
+        max_attempts=found.max_attempts,
+        timeout=found.timeout or getattr(settings, 'EMS_JOB_TIMEOUT', 900),
+    )
+
+
+def claim(worker, limit):
+    """Mark up to `limit` due jobs as RUNNING for `worker` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.filter(status=PENDING, run_at__lte=now).order_by('run_at', 'id')
+        ids = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids, status=PENDING).update(
+            status=RUNNING, worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, status=RUNNING, worker=worker).order_by('run_at', 'id'))
+
+
+def execute(name, args, kwargs):
+    """Run one task body. Called in pool threads and pool processes."""
+    try:
+        return REGISTRY[name].func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value, cls=DjangoJSONEncoder)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def complete(job, result):
+    Job.objects.filter(pk=job.pk, status=RUNNING, worker=job.worker).update(
+        status=DONE, result=_jsonable(result), error='', finished_at=timezone.now(),
+    )
+
+
+def fail(job, error):
+    """Retry `job` after a backoff, or mark it FAILED once its attempts are used up."""
+    now = timezone.now()
+    running = Job.objects.filter(pk=job.pk, status=RUNNING, worker=job.worker)
+    if job.attempts < job.max_attempts:
+        delay = getattr(settings, 'EMS_JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+        running.update(status=PENDING, error=error, worker='', run_at=now + timedelta(seconds=delay))
+    else:
+        running.update(status=FAILED, error=error, finished_at=now)
+
+
+def requeue_stale(now=None):
+    """Fail or retry RUNNING jobs whose worker went away (no heartbeat for EMS_JOB_STALE_SECONDS)."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'EMS_JOB_STALE_SECONDS', 300))
+    stale = Job.objects.filter(status=RUNNING, heartbeat_at__lt=cutoff)
+    error = 'worker stopped while the job was running'
+    retried = stale.filter(attempts__lt=F('max_attempts')).update(status=PENDING, worker='', error=error, run_at=now)
+    failed = stale.update(status=FAILED, error=error, finished_at=now)
+    return retried + failed
+
+
+def purge(now=None):
+    """Delete DONE jobs older than EMS_JOB_KEEP_DAYS."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, 'EMS_JOB_KEEP_DAYS', 7))
+    return Job.objects.filter(status=DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def _init_process():
+    import django
+    django.setup()
+
+
+def _run_in_process(sender, name, args, kwargs):
+    # Ctrl-C reaches the whole process group; only the worker should react to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_process()
+    try:
+        sender.send((True, _jsonable(execute(name, args, kwargs))))
+    except BaseException:
+        sender.send((False, traceback.format_exc()))
+    finally:
+        sender.close()
+
+
+class ThreadRun:
+    """A job on the worker's thread pool. Cannot be stopped once started."""
+
+    killable = False
+
+    def __init__(self, pool, job):
+        self.future = pool.submit(execute, job.name, job.args, job.kwargs)
+
+    def done(self):
+        return self.future.done()
+
+    def outcome(self):
+        """(True, result) or (False, error text); only once done()."""
+        exc = self.future.exception()
+        if exc is None:
+            return True, self.future.result()
+        return False, ''.join(traceback.format_exception(exc))
+
+
+class ProcessRun:
+    """A job in a process of its own, so that a timeout can kill it."""
+
+    killable = True
+
+    def __init__(self, context, job):
+        self.receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_run_in_process, args=(sender, job.name, job.args, job.kwargs), daemon=True,
+        )
+        self.process.start()
+        sender.close()
+        self._outcome = None
+
+    @property
+    def sentinel(self):
+        return self.process.sentinel
+
+    def done(self):
+        if self._outcome is None and (self.receiver.poll() or not self.process.is_alive()):
+            try:
+                self._outcome = self.receiver.recv()
+            except EOFError:  # died without reporting, e.g. killed by the OOM killer
+                self._outcome = (False, f'job process exited with code {self.process.exitcode}')
+            self.process.join()
+            self.receiver.close()
+        return self._outcome is not None
+
+    def outcome(self):
+        return self._outcome
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.receiver.close()
+
+
+class Worker:
+    """Claims due jobs and runs up to `concurrency` of them at once in threads or processes."""
+
+    HOUSEKEEPING_SECONDS = 60
+    HEARTBEAT_SECONDS = 30
+
+    def __init__(self, concurrency=2, processes=False, poll=1.0, stdout=None):
+        self.concurrency = concurrency
+        self.processes = processes
+        self.poll = poll
+        self.stdout = stdout
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.running = {}  # run -> (job, deadline)
+        self.overdue = set()  # thread runs past their deadline: reported once, finished when they return
+
+    def log(self, message):
+        logger.info(message)
+        if self.stdout:
+            self.stdout.write(message)
+
+    def stop(self, *args):
+        if not self.stopping.is_set():
+            self.log("Stopping: no new jobs are claimed; waiting for running ones")
+        self.stopping.set()
+
+    def start(self, job):
+        if self.processes:
+            # spawn, not fork: a forked child would share the parent's SQLite connection
+            return ProcessRun(get_context('spawn'), job)
+        return ThreadRun(self.pool, job)
+
+    def run(self, once=False):
+        """Work until stopped; with `once`, exit as soon as no job is due or running."""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.stop)
+        housekeeping_at = heartbeat_at = 0
+        self.pool = None if self.processes else ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+        while True:
+            now = timezone.now()
+            if now.timestamp() >= housekeeping_at:
+                requeue_stale(now)
+                purge(now)
+                housekeeping_at = now.timestamp() + self.HOUSEKEEPING_SECONDS
+            if self.running and now.timestamp() >= heartbeat_at:
+                self.heartbeat(now)
+                heartbeat_at = now.timestamp() + self.HEARTBEAT_SECONDS
+            self.reap()
+            free = self.concurrency - len(self.running)
+            claimed = claim(self.name, free) if free > 0 and not self.stopping.is_set() else []
+            for job in claimed:
+                self.running[self.start(job)] = (job, now + timedelta(seconds=job.timeout))
+                self.log(f"Started job #{job.pk} {job.name} (attempt {job.attempts}/{job.max_attempts})")
+            close_old_connections()
+            if not self.running and (self.stopping.is_set() or (once and not claimed)):
+                break
+            if claimed:
+                continue
+            self.wait()
+        if self.pool is not None:
+            self.pool.shutdown()
+        connections.close_all()
+
+    def wait(self):
+        """Sleep until a running job finishes, or for `poll` seconds."""
+        if not self.running:
+            self.stopping.wait(self.poll)
+        elif self.processes:
+            wait_for_processes([run.sentinel for run in self.running], timeout=self.poll)
+        else:
+            wait([run.future for run in self.running], timeout=self.poll, return_when=FIRST_COMPLETED)
+
+    def heartbeat(self, now):
+        Job.objects.filter(
+            pk__in=[job.pk for job, _ in self.running.values()], status=RUNNING, worker=self.name,
+        ).update(heartbeat_at=now)
+
+    def reap(self):
+        now = timezone.now()
+        for run, (job, deadline) in list(self.running.items()):
+            if run.done():
+                del self.running[run]
+                self.overdue.discard(run)
+                ok, value = run.outcome()
+                if ok:
+                    complete(job, value)
+                    self.log(f"Finished job #{job.pk} {job.name}")
+                else:
+                    fail(job, value)
+                    self.log(f"Job #{job.pk} {job.name} failed: {value.strip().splitlines()[-1]}")
+            elif now > deadline and run.killable:
+                run.kill()
+                del self.running[run]
+                fail(job, f'timed out after {job.timeout}s')
+                self.log(f"Job #{job.pk} {job.name} timed out after {job.timeout}s and was stopped")
+            elif now > deadline and run not in self.overdue:
+                self.overdue.add(run)
+                self.log(f"Job #{job.pk} {job.name} is past its {job.timeout}s timeout; "
+                         "threads cannot be stopped, so it is finished when it returns")
@@ -0,0 +1,117 @@
+"""
+Interval queries over Leave.
+
+Both checks are single range queries on (start_date <= end AND end_date >= start),
+served by the (employee, start_date, end_date) and (status, start_date) indexes.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters, fragments
+from .models import Leave
+
+# Leaves that still block the calendar; rejected requests do not
+ACTIVE_STATUSES = ('PENDING', 'APPROVED')
+
+
+def overlapping(employee_id, start, end, exclude_pk=None):
+    qs = Leave.objects.filter(
+        employee_id=employee_id, status__in=ACTIVE_STATUSES,
+        start_date__lte=end, end_date__gte=start,
+    )
+    if exclude_pk:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs
+
+
+def _days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _merge(ranges):
+    """Sorted, non-overlapping (start, end) ranges covering the same days as `ranges`."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+# days: every day of the wanted ranges; off: approved leaves overlapping a range
+_COVERAGE_SQL = """
+WITH RECURSIVE
+ranges(department_id, first, last) AS (VALUES {values}),
+days(department_id, day, last) AS (
+    SELECT department_id, first, last FROM ranges
+    UNION ALL
+    SELECT department_id, date(day, '+1 day'), last FROM days WHERE day < last
+),
+off AS (
+    SELECT DISTINCT l.id, l.department_id, l.start_date, l.end_date
+    FROM {table} l JOIN ranges r ON l.department_id = r.department_id
+    WHERE l.status = 'APPROVED' AND l.start_date <= r.last AND l.end_date >= r.first
+)
+SELECT d.department_id, d.day, COUNT(*)
+FROM days d JOIN off o ON o.department_id = d.department_id AND o.start_date <= d.day AND o.end_date >= d.day
+GROUP BY d.department_id, d.day
+"""
+
+
+def attach_coverage(leaves):
+    """
+    Set `coverage` on each leave to [(day, approved leaves in the same
+    department that day)] over its period. One query counts the leaves per
+    department and day, only over the days the given leaves cover.
+    """
+    for l in leaves:
+        l.coverage, l.coverage_peak = [], 0
+    leaves = [l for l in leaves if l.department_id]
+    if not leaves:
+        return
+    wanted = defaultdict(list)
+    for l in leaves:
+        wanted[l.department_id].append((l.start_date, l.end_date))
+    ops = connection.ops
+    params = [
+        value
+        for dept_id, ranges in wanted.items() for start, end in _merge(ranges)
+        for value in (dept_id, ops.adapt_datefield_value(start), ops.adapt_datefield_value(end))
+    ]
+    sql = _COVERAGE_SQL.format(
+        values=', '.join(['(%s, %s, %s)'] * (len(params) // 3)), table=Leave._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        off = {(dept_id, date.fromisoformat(day)): n for dept_id, day, n in cursor.fetchall()}
+
+    for l in leaves:
+        l.coverage = [(day, off.get((l.department_id, day), 0)) for day in _days(l.start_date, l.end_date)]
+        l.coverage_peak = max((n for _, n in l.coverage), default=0)
+
+
+def decide(leaves, status, user, department_id=None):
+    """
+    Approve or reject every still-pending leave in `leaves` with one UPDATE.
+    `department_id` limits the change to a manager's department. Returns the
+    number of rows changed.
+    """
+    qs = leaves.filter(status='PENDING')
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    with transaction.atomic():
+        # update() sends no signals, so note whose counters move first
+        employee_ids = set(qs.order_by().values_list('employee_id', flat=True))
+        now = timezone.now()
+        changed = qs.update(status=status, decided_by=user, decided_at=now, updated_at=now)
+        counters.touch('global', 'leaves_pending')
+        counters.touch('user', 'leaves_pending', *employee_ids)
+        fragments.bump('leave')
+    return changed
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import archive
+from core.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Move attendance older than the retention window into the archive table and summarize it per month"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help="Whole months to keep in the hot table (default: EMS_ATTENDANCE_RETENTION_MONTHS)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would move")
+
+    def handle(self, *args, **options):
+        months = options['months']
+        if months is None:
+            months = getattr(settings, 'EMS_ATTENDANCE_RETENTION_MONTHS', 12)
+        cutoff = archive.cutoff_for(months, timezone.localdate())
+        if options['dry_run']:
+            count = Attendance.objects.filter(date__lt=cutoff).count()
+            self.stdout.write(f"{count} attendance rows dated before {cutoff} would be archived.")
+            return
+        moved = archive.archive(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} attendance rows dated before {cutoff}."))
@@ -0,0 +1,90 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from core.management.commands.profile_report import percentile
+
+DEFAULT_PATHS = ('/',)
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = percentile(latencies, 95)
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000, p95 * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare the WSGI and ASGI request handlers on read-only pages at a given concurrency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS,
+                            help="Paths to request, e.g. '/reports/attendance/?department=1'")
+        parser.add_argument('--username', required=True, help="User the requests are logged in as")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per path and handler")
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        aclient = AsyncClient(HTTP_HOST='localhost')
+        aclient.cookies = client.cookies
+
+        self.stdout.write(f"{options['requests']} requests per row, concurrency {options['concurrency']}")
+        self.stdout.write(f"{'handler':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}  path")
+        for path in options['paths']:
+            for label, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                started = time.perf_counter()
+                latencies, statuses = run(client if label == 'wsgi' else aclient, path, options)
+                rate, p50, p95 = _summary(latencies, time.perf_counter() - started)
+                bad = {s for s in statuses if s != 200}
+                note = f"  (status {sorted(bad)})" if bad else ''
+                self.stdout.write(f"{label:<8}{rate:>10.0f}{p50:>10.1f}{p95:>10.1f}  {path}{note}")
+
+    def run_wsgi(self, client, path, options):
+        # one Client per thread, as gunicorn --threads would hand out requests
+        def worker(n):
+            c = Client(HTTP_HOST='localhost')
+            c.cookies = client.cookies
+            out = []
+            for _ in range(n):
+                t = time.perf_counter()
+                status = c.get(path).status_code
+                out.append((time.perf_counter() - t, status))
+            return out
+
+        def main(sizes):
+            with ThreadPoolExecutor(len(sizes)) as pool:
+                return [r for chunk in pool.map(worker, sizes) for r in chunk]
+
+        return self._split(options, main)
+
+    def run_asgi(self, client, path, options):
+        async def worker(n):
+            out = []
+            for _ in range(n):
+                t = time.perf_counter()
+                status = (await client.get(path)).status_code
+                out.append((time.perf_counter() - t, status))
+            return out
+
+        async def main(sizes):
+            chunks = await asyncio.gather(*(worker(n) for n in sizes))
+            return [r for chunk in chunks for r in chunk]
+
+        return self._split(options, lambda sizes: asyncio.run(main(sizes)))
+
+    def _split(self, options, run):
+        total, workers = options['requests'], max(1, options['concurrency'])
+        sizes = [total // workers + (i < total % workers) for i in range(workers)]
+        results = run([n for n in sizes if n])
+        return [r[0] for r in results], [r[1] for r in results]
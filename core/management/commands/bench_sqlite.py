@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = """
+CREATE TABLE bench_attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX bench_attendance_emp ON bench_attendance (employee_id, day);
+"""
+
+
+def _connect(path, tuned):
+    if not tuned:
+        # stock Django: 5s driver timeout, rollback journal, no pragmas
+        return sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn = sqlite3.connect(path, timeout=20, isolation_level=None)
+    for name, value in settings.EMS_SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _worker(path, tuned, role, seconds, results):
+    ops = errors = 0
+    conn = _connect(path, tuned) if tuned else None
+    rng = random.Random(os.getpid())
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        # before: a fresh connection per request (CONN_MAX_AGE=0); after: reused
+        c = conn or _connect(path, tuned)
+        emp = rng.randrange(1000)
+        try:
+            if role == 'write':
+                # same shape as the roster/leave views: read, then write, in one transaction
+                c.execute("BEGIN IMMEDIATE" if tuned else "BEGIN")
+                c.execute("SELECT count(*) FROM bench_attendance WHERE employee_id = ?", (emp,)).fetchone()
+                c.execute("INSERT INTO bench_attendance (employee_id, day, status) VALUES (?, ?, 'PRESENT')",
+                          (emp, rng.randrange(365)))
+                c.execute("COMMIT")
+            else:
+                c.execute("SELECT status, count(*) FROM bench_attendance WHERE employee_id = ? GROUP BY status",
+                          (emp,)).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if c.in_transaction:
+                c.execute("ROLLBACK")
+        finally:
+            if conn is None:
+                c.close()
+    results.put((role, ops, errors))
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent SQLite read/write throughput with stock settings vs EMS_SQLITE_PRAGMAS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=100000, help="Rows preloaded before the run")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['readers']} readers, {options['writers']} writers, "
+                          f"{options['seconds']:.0f}s per mode, {options['rows']} preloaded rows")
+        self.stdout.write(f"{'mode':<8}{'reads/s':>12}{'writes/s':>12}{'lock errors':>14}")
+        for label, tuned in (('before', False), ('after', True)):
+            reads, writes, errors = self.run_mode(tuned, options)
+            self.stdout.write(f"{label:<8}{reads:>12.0f}{writes:>12.0f}{errors:>14}")
+
+    def run_mode(self, tuned, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            setup = sqlite3.connect(path)
+            setup.executescript(SCHEMA)
+            setup.executemany(
+                "INSERT INTO bench_attendance (employee_id, day, status) VALUES (?, ?, 'PRESENT')",
+                ((i % 1000, i % 365) for i in range(options['rows'])),
+            )
+            setup.commit()
+            if tuned:
+                setup.execute("PRAGMA journal_mode = WAL")
+            setup.close()
+
+            results = multiprocessing.Queue()
+            procs = [
+                multiprocessing.Process(target=_worker, args=(path, tuned, role, options['seconds'], results))
+                for role in ['read'] * options['readers'] + ['write'] * options['writers']
+            ]
+            for p in procs:
+                p.start()
+            totals = {'read': 0, 'write': 0}
+            errors = 0
+            for _ in procs:
+                role, ops, errs = results.get()
+                totals[role] += ops
+                errors += errs
+            for p in procs:
+                p.join()
+        seconds = options['seconds']
+        return totals['read'] / seconds, totals['write'] / seconds, errors
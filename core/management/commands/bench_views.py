@@ -0,0 +1,214 @@
+import json
+import re
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.management.commands.profile_report import percentile
+from core.middleware import collect
+from core.models import Department, Position
+from core.urls import urlpatterns
+
+# label -> (url name, kwargs built from the sample objects, query string)
+TARGETS = {
+    'dashboard': ('dashboard', None, ''),
+    'department_list': ('department_list', None, ''),
+    'department_create': ('department_create', None, ''),
+    'department_update': ('department_update', lambda s: {'pk': s['department']}, ''),
+    'department_delete': ('department_delete', lambda s: {'pk': s['department']}, ''),
+    'position_list': ('position_list', None, ''),
+    'position_create': ('position_create', None, ''),
+    'position_update': ('position_update', lambda s: {'pk': s['position']}, ''),
+    'position_delete': ('position_delete', lambda s: {'pk': s['position']}, ''),
+    'employee_list': ('employee_list', None, ''),
+    'employee_list?q': ('employee_list', None, 'q=sha'),
+    'employee_create': ('employee_create', None, ''),
+    'employee_update': ('employee_update', lambda s: {'user_id': s['employee']}, ''),
+    'employee_delete': ('employee_delete', lambda s: {'user_id': s['employee']}, ''),
+    'attendance_list': ('attendance_list', None, ''),
+    'attendance_list?q': ('attendance_list', None, 'q=sha'),
+    'attendance_create': ('attendance_create', None, ''),
+    'attendance_roster': ('attendance_roster', None, 'department={department}'),
+    'my_attendance': ('my_attendance', None, ''),
+    'leave_list': ('leave_list', None, ''),
+    'leave_apply': ('leave_apply', None, ''),
+    'my_leaves': ('my_leaves', None, ''),
+    'session_list': ('session_list', None, ''),
+    'attendance_report': ('attendance_report', None, 'department={department}'),
+    'session_report': ('session_report', None, 'department={department}'),
+    'export_csv:attendance': ('export_csv', lambda s: {'kind': 'attendance'}, 'department={department}'),
+    'export_csv:leaves': ('export_csv', lambda s: {'kind': 'leaves'}, ''),
+    'api_list:attendance': ('api_list', lambda s: {'resource': 'attendance'}, ''),
+    'api_list:leaves': ('api_list', lambda s: {'resource': 'leaves'}, 'fields=id,status,username'),
+    'api_list:profiles': ('api_list', lambda s: {'resource': 'profiles'}, ''),
+    'api_list:sessions': ('api_list', lambda s: {'resource': 'sessions'}, ''),
+    'autocomplete:employees': ('autocomplete', lambda s: {'kind': 'employees'}, 'q=sha'),
+    'autocomplete:positions': ('autocomplete', lambda s: {'kind': 'positions'}, 'department={department}'),
+}
+
+# Never driven: they change data on GET, or only accept POST
+SKIPPED = {
+    'leave_approve', 'leave_reject', 'leave_bulk_decide',
+    'api_attendance_bulk', 'api_leave_apply', 'api_leave_decide',
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    help = "Load-test every page in core/urls.py and fail when a view exceeds its stored latency/query budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the requests are logged in as (an admin)")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per page")
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--base-url', help="Drive a running server (e.g. http://127.0.0.1:8000) "
+                                               "instead of the in-process test client")
+        parser.add_argument('--only', nargs='*', help="Labels to run (default: all)")
+        parser.add_argument('--budgets', default=None, help="Budget file (default: EMS_BENCH_BUDGETS)")
+        parser.add_argument('--write-budgets', action='store_true',
+                            help="Store this run's results (times --headroom) as the new budgets")
+        parser.add_argument('--headroom', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        missing = {p.name for p in urlpatterns if p.name} - SKIPPED - {name for name, _, _ in TARGETS.values()}
+        for name in sorted(missing):
+            self.stderr.write(f"warning: no benchmark target for URL {name!r}; add it to TARGETS")
+
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        self.cookies = client.cookies
+        samples = self.samples()
+        budgets_path = options['budgets'] or getattr(settings, 'EMS_BENCH_BUDGETS', None)
+        budgets = {}
+        if budgets_path:
+            try:
+                with open(budgets_path, encoding='utf-8') as fh:
+                    budgets = json.load(fh)
+            except FileNotFoundError:
+                if not options['write_budgets']:
+                    self.stderr.write(f"warning: {budgets_path} not found, nothing to compare against")
+
+        self.stdout.write(f"{options['requests']} requests per page over {options['threads']} threads")
+        self.stdout.write(f"{'page':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+                          f"{'budget':>16}  result")
+        results, failures = {}, []
+        for label, (name, kwargs, query) in TARGETS.items():
+            if options['only'] and label not in options['only']:
+                continue
+            path = reverse(name, kwargs=kwargs(samples) if kwargs else None)
+            if query:
+                path += '?' + query.format(**samples)
+            latencies, queries, statuses = self.drive(path, options)
+            bad = sorted({s for s in statuses if s >= 400})
+            lat = sorted(latencies)
+            p50, p95, p99 = (percentile(lat, p) * 1000 for p in (50, 95, 99))
+            max_queries = max(queries) if queries and None not in queries else None
+            results[label] = {'p95_ms': p95, 'queries': max_queries}
+
+            budget = None if options['write_budgets'] else budgets.get(label)
+            problems = [f"HTTP {bad}"] if bad else []
+            if budget:
+                if p95 > budget['p95_ms']:
+                    problems.append(f"p95 {p95:.0f}ms > {budget['p95_ms']}ms")
+                if max_queries is not None and budget.get('queries') is not None and max_queries > budget['queries']:
+                    problems.append(f"{max_queries} queries > {budget['queries']}")
+            budget_text = f"{budget['p95_ms']}ms/{budget.get('queries')}q" if budget else '-'
+            verdict = '; '.join(problems) or 'ok'
+            if problems:
+                failures.append(label)
+            self.stdout.write(f"{label[:23]:<24}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+                              f"{'?' if max_queries is None else max_queries:>9}{budget_text:>16}  {verdict}")
+
+        if options['write_budgets']:
+            if not budgets_path:
+                raise CommandError("No budget file: pass --budgets or set EMS_BENCH_BUDGETS")
+            self.write_budgets(budgets_path, budgets, results, options['headroom'])
+        if failures:
+            raise CommandError(f"{len(failures)} page(s) over budget or failing: {', '.join(failures)}")
+
+    def samples(self):
+        """Objects whose ids fill the URL parameters: the largest department and one of its employees."""
+        department = Department.objects.annotate(n=Count('employeeprofile')).order_by('-n').first()
+        if department is None:
+            raise CommandError("No data to benchmark; run seed_ems first")
+        employee = User.objects.filter(profile__department=department, is_superuser=False).first()
+        position = Position.objects.filter(department=department).first()
+        return {
+            'department': department.pk,
+            'employee': employee.pk if employee else None,
+            'position': position.pk if position else None,
+        }
+
+    def drive(self, path, options):
+        fetch = self.fetch_http if options['base_url'] else self.fetch_client
+        total, threads = options['requests'], max(1, options['threads'])
+        sizes = [n for n in (total // threads + (i < total % threads) for i in range(threads)) if n]
+        fetch(path, options, 1)  # warm caches and connections outside the measurement
+
+        with ThreadPoolExecutor(len(sizes)) as pool:
+            chunks = list(pool.map(lambda n: fetch(path, options, n), sizes))
+        rows = [r for chunk in chunks for r in chunk]
+        return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+    def fetch_client(self, path, options, n):
+        client = Client(HTTP_HOST='localhost')
+        client.cookies = self.cookies
+        connection.ensure_connection()  # the connection's setup PRAGMAs are not the page's queries
+        out = []
+        for _ in range(n):
+            # counts the queries async views run on core.aio pool threads too
+            with collect() as profile:
+                started = time.perf_counter()
+                response = client.get(path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            out.append((elapsed, profile.queries, response.status_code))
+        connection.close()  # each worker thread opened its own connection
+        return out
+
+    def fetch_http(self, path, options, n):
+        cookie = '; '.join(f'{k}={v.value}' for k, v in self.cookies.items())
+        out = []
+        for _ in range(n):
+            request = urllib.request.Request(options['base_url'].rstrip('/') + path, headers={'Cookie': cookie})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    status, timing = response.status, response.headers.get('Server-Timing', '')
+            except urllib.error.HTTPError as exc:
+                status, timing = exc.code, ''
+            elapsed = time.perf_counter() - started
+            # query counts are only known when the server runs with EMS_PROFILING=1
+            match = SERVER_TIMING_QUERIES.search(timing)
+            out.append((elapsed, int(match.group(1)) if match else None, status))
+        return out
+
+    def write_budgets(self, path, budgets, results, headroom):
+        # labels not run this time (see --only) keep their old budgets
+        budgets.update({
+            label: {
+                # round up to 10ms so budgets do not churn on every re-record
+                'p95_ms': int(-(-r['p95_ms'] * headroom // 10) * 10),
+                'queries': r['queries'],
+            }
+            for label, r in results.items()
+        })
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(budgets, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(budgets)} budgets to {path}"))
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import thumbnails
+from core.models import EmployeeProfile
+
+class Command(BaseCommand):
+    help = "Generate missing profile photo thumbnails (or all of them with --force)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate existing thumbnails too")
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        profiles = EmployeeProfile.objects.exclude(photo='').exclude(photo__isnull=True)
+        todo = [
+            (pk, photo) for pk, photo, thumbs in profiles.values_list('pk', 'photo', 'photo_thumbs')
+            if options['force'] or (thumbs or {}).get('src') != photo
+        ]
+
+        def run(pk, photo):
+            try:
+                return thumbnails.build(pk, photo)
+            finally:
+                close_old_connections()
+
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(run, pk, photo): photo for pk, photo in todo}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Built thumbnails for {done} photos, {failed} failed."))
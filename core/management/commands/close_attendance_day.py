@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core import absences
+
+
+def _date(value, option):
+    day = parse_date(value)
+    if day is None:
+        raise CommandError(f"{option} must be YYYY-MM-DD, got {value!r}")
+    return day
+
+
+class Command(BaseCommand):
+    help = ("Mark employees with no attendance and no approved leave ABSENT for a day "
+            "(default: yesterday) or a range of days")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Day to close, YYYY-MM-DD (default: yesterday)")
+        parser.add_argument('--start', help="First day of a backfill range")
+        parser.add_argument('--end', help="Last day of a backfill range (default: yesterday)")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be added")
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        if options['start']:
+            if options['date']:
+                raise CommandError("Pass either --date or --start/--end")
+            start = _date(options['start'], '--start')
+            end = _date(options['end'], '--end') if options['end'] else yesterday
+        else:
+            start = end = _date(options['date'], '--date') if options['date'] else yesterday
+        if end < start:
+            raise CommandError("--end is before --start")
+        try:
+            result = absences.close(start, end, dry_run=options['dry_run'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        verb = "would be marked" if options['dry_run'] else "marked"
+        for day, count in result.items():
+            self.stdout.write(f"{day}: {count} absent {verb}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(result.values())} absences {verb} over {len(result)} working day(s) from {start} to {end}."
+        ))
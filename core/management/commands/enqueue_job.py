@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Queue a background job, e.g. from cron: enqueue_job archive_attendance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help="Task name; omit to list the registered tasks")
+        parser.add_argument('--args', default='[]', help="Positional arguments as a JSON list")
+        parser.add_argument('--kwargs', default='{}', help="Keyword arguments as a JSON object")
+        parser.add_argument('--delay', type=int, default=0, help="Seconds before the job becomes due")
+
+    def handle(self, *args, **options):
+        if not options['name']:
+            for name, found in sorted(jobs.REGISTRY.items()):
+                self.stdout.write(f"{name}  (attempts {found.max_attempts}, timeout {found.timeout or 'default'})")
+            return
+        try:
+            call_args, call_kwargs = json.loads(options['args']), json.loads(options['kwargs'])
+        except ValueError as exc:
+            raise CommandError(f"--args/--kwargs must be JSON: {exc}")
+        if not isinstance(call_args, list) or not isinstance(call_kwargs, dict):
+            raise CommandError("--args must be a JSON list and --kwargs a JSON object")
+        try:
+            job = jobs.enqueue(options['name'], *call_args, delay=options['delay'], **call_kwargs)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk} {job.name}"))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.exports import EXPORTS, csv_lines, export_rows
+
+class Command(BaseCommand):
+    help = "Stream attendance, leaves or sessions as CSV to a file or stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--start', help="First date (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Last date (YYYY-MM-DD), inclusive")
+        parser.add_argument('--department', type=int, help="Department id to limit to")
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('-o', '--output', help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            value = options[name]
+            dates[name] = parse_date(value) if value else None
+            if value and dates[name] is None:
+                raise CommandError(f"Invalid --{name} date: {value}")
+
+        rows = export_rows(options['kind'], dates['start'], dates['end'],
+                           options['department'], options['chunk_size'])
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        count = -1  # header
+        try:
+            for line in csv_lines(rows):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} rows to {options['output']}"))
@@ -0,0 +1,67 @@
+import json
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    # the smallest value with at least pct% of the samples at or below it
+    index = max(0, math.ceil(pct * len(values) / 100) - 1)
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = "Summarize the request profiling log: latency percentiles and query counts per URL name"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help="Log file (default: EMS_PROFILE_LOG)")
+        parser.add_argument('--min-count', type=int, default=1, help="Skip URLs with fewer requests")
+        parser.add_argument('--duplicates', type=int, default=3,
+                            help="Most repeated SQL statements to show from slow requests")
+
+    def handle(self, *args, **options):
+        path = options['log'] or getattr(settings, 'EMS_PROFILE_LOG', None)
+        if not path:
+            raise CommandError("No log file: pass --log or set EMS_PROFILE_LOG")
+        by_url = defaultdict(list)
+        repeated = Counter()
+        try:
+            with open(path, encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    by_url[entry.get('url_name') or entry.get('path')].append(entry)
+                    for dup in entry.get('duplicates', ()):
+                        repeated[dup['sql']] += dup['count']
+        except FileNotFoundError:
+            raise CommandError(f"{path} does not exist; run with EMS_PROFILING=1 first")
+
+        rows = []
+        for name, entries in by_url.items():
+            if len(entries) < options['min_count']:
+                continue
+            totals = sorted(e['total_ms'] for e in entries)
+            rows.append((
+                name, len(entries),
+                percentile(totals, 50), percentile(totals, 95), percentile(totals, 99),
+                sum(e['queries'] for e in entries) / len(entries),
+                sum(e['db_ms'] for e in entries) / len(entries),
+                sum(1 for e in entries if e.get('slow')),
+            ))
+        rows.sort(key=lambda r: r[3], reverse=True)
+
+        self.stdout.write(f"{'url':<28}{'n':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                          f"{'queries':>9}{'db ms':>8}{'slow':>6}")
+        for name, n, p50, p95, p99, queries, db_ms, slow in rows:
+            self.stdout.write(f"{str(name)[:27]:<28}{n:>7}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+                              f"{queries:>9.1f}{db_ms:>8.1f}{slow:>6}")
+
+        if repeated and options['duplicates']:
+            self.stdout.write("\nMost repeated SQL in slow requests:")
+            for sql, count in repeated.most_common(options['duplicates']):
+                self.stdout.write(f"{count:>7}x  {sql[:200]}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core import counters
+
+class Command(BaseCommand):
+    help = "Recompute all dashboard counters from the source tables"
+
+    def handle(self, *args, **options):
+        written = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} counters."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import search
+
+class Command(BaseCommand):
+    help = "Recreate and repopulate the employee full-text search index"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The FTS5 search index is only available on SQLite.")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(search.DROP_SQL)
+            cursor.execute(search.CREATE_SQL)
+            search.reindex()
+            cursor.execute(f"SELECT count(*) FROM {search.TABLE}")
+            count = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} users."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core import rollups
+from core.models import SessionDay
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user, per-day session totals (SessionDay) from UserSession"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day to rebuild, YYYY-MM-DD (default: all history)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"--since must be YYYY-MM-DD, got {options['since']!r}")
+        read = rollups.rebuild(since, batch_size=options['batch_size'])
+        days = SessionDay.objects.filter(day__gte=since) if since else SessionDay.objects.all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {read} closed sessions into {days.count()} user-days"
+            + (f" from {since}" if since else "") + "."
+        ))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (core.jobs) until stopped with Ctrl-C or SIGTERM"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Jobs run at once (default: EMS_JOB_WORKERS)")
+        parser.add_argument('--processes', action='store_true',
+                            help="Run each job in a process of its own instead of a thread: "
+                                 "for CPU-bound tasks, and so that timed-out jobs can be killed")
+        parser.add_argument('--poll', type=float, default=None,
+                            help="Seconds between checks for new jobs when idle (default: EMS_JOB_POLL_SECONDS)")
+        parser.add_argument('--once', action='store_true', help="Exit once no job is due, e.g. from cron")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'] or getattr(settings, 'EMS_JOB_WORKERS', 2),
+            processes=options['processes'],
+            poll=options['poll'] or getattr(settings, 'EMS_JOB_POLL_SECONDS', 1.0),
+            stdout=self.stdout,
+        )
+        mode = 'processes' if worker.processes else 'threads'
+        self.stdout.write(f"Worker {worker.name} running up to {worker.concurrency} jobs in {mode}")
+        worker.run(once=options['once'])
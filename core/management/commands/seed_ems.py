@@ -0,0 +1,206 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import counters, fragments, rollups, search
+from core.db import batches
+from core.models import Attendance, Department, EmployeeProfile, Leave, Position, UserSession
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Finance', 'Operations', 'Support', 'Marketing',
+               'Human Resources', 'Legal', 'Product', 'Research', 'Logistics', 'Design']
+POSITIONS = ['Associate', 'Analyst', 'Specialist', 'Senior Specialist', 'Team Lead', 'Manager', 'Director', 'Intern']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Divya', 'Arjun', 'Meera', 'Karthik', 'Lakshmi',
+               'John', 'Maria', 'Wei', 'Fatima', 'Lucas', 'Sofia', 'Omar', 'Yuki', 'Noah', 'Amara']
+LAST_NAMES = ['Sharma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Gupta', 'Menon', 'Rao', 'Das', 'Khan',
+              'Smith', 'Garcia', 'Chen', 'Ali', 'Silva', 'Rossi', 'Haddad', 'Tanaka', 'Brown', 'Okafor']
+STATUS_WEIGHTS = (('PRESENT', 85), ('LATE', 8), ('ABSENT', 7))
+
+
+def _weekdays(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic departments, employees, attendance, leaves and sessions for local load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--positions', type=int, default=5, help="Positions per department")
+        parser.add_argument('--employees', type=int, default=500)
+        parser.add_argument('--years', type=float, default=1.0, help="Years of attendance history")
+        parser.add_argument('--leaves', type=int, default=4, help="Leave requests per employee per year")
+        parser.add_argument('--sessions', type=int, default=100, help="Login sessions per employee per year")
+        parser.add_argument('--prefix', default='seed', help="Username prefix of generated employees")
+        parser.add_argument('--password', default='password', help="Password every generated user gets")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, for reproducible data")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; pass another --prefix")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = timezone.localdate()
+        self.first_day = self.today - timedelta(days=int(options['years'] * 365))
+        started = time.monotonic()
+
+        positions = self.seed_departments(options['departments'], options['positions'])
+        employees = self.seed_employees(positions, options['employees'], prefix, options['password'])
+        leave_days = self.seed_leaves(employees, options['leaves'] * options['years'])
+        attendance = self.seed_attendance(employees, leave_days)
+        sessions = self.seed_sessions(employees, int(options['sessions'] * options['years']))
+
+        # bulk_create skips signals: rebuild what they would have maintained
+        counters.rebuild()
+        search.reindex()
+        rollups.rebuild()
+        with transaction.atomic():
+            fragments.bump('user', 'department', 'position', 'employeeprofile', 'attendance', 'leave')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(positions)} positions, {len(employees)} employees, {attendance} attendance rows, "
+            f"{sum(len(d) for d in leave_days.values())} leave days and {sessions} sessions "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def seed_departments(self, count, per_department):
+        names = [DEPARTMENTS[i % len(DEPARTMENTS)] + (f' {i // len(DEPARTMENTS) + 1}' if i >= len(DEPARTMENTS) else '')
+                 for i in range(count)]
+        departments = [Department.objects.get_or_create(name=name)[0] for name in names]
+        Position.objects.bulk_create(
+            [Position(name=POSITIONS[i % len(POSITIONS)], department=d)
+             for d in departments for i in range(min(per_department, len(POSITIONS)))],
+            ignore_conflicts=True,
+        )
+        return list(Position.objects.filter(department__in=departments).select_related('department'))
+
+    def seed_employees(self, positions, count, prefix, password):
+        rng = self.rng
+        hashed = make_password(password)  # one hash shared by every user: seeding is not about auth
+        groups = {name: Group.objects.get_or_create(name=name)[0] for name in ('MANAGER', 'EMPLOYEE')}
+        by_department = {}
+        for p in positions:
+            by_department.setdefault(p.department_id, []).append(p)
+        department_ids = list(by_department)
+
+        joined = timezone.make_aware(datetime.combine(self.first_day, datetime.min.time()))
+        employees = []  # (user_id, department_id, manager_id)
+        with transaction.atomic():
+            for batch in batches(range(count), self.batch_size):
+                rows = []
+                for i in batch:
+                    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                    dept_id = department_ids[i % len(department_ids)]
+                    rows.append((User(
+                        username=f'{prefix}{i:06d}', first_name=first, last_name=last,
+                        email=f'{first}.{last}.{i}@example.com'.lower(), password=hashed,
+                        date_joined=joined,  # before their first attendance row
+                    ), dept_id, rng.choice(by_department[dept_id]).pk))
+                User.objects.bulk_create([u for u, _, _ in rows])
+                ids = dict(User.objects.filter(username__in=[u.username for u, _, _ in rows])
+                           .values_list('username', 'pk'))
+                EmployeeProfile.objects.bulk_create([
+                    EmployeeProfile(user_id=ids[u.username], department_id=dept_id, position_id=position_id,
+                                    phone=f'+91{rng.randrange(7000000000, 9999999999)}')
+                    for u, dept_id, position_id in rows
+                ])
+                employees += [(ids[u.username], dept_id) for u, dept_id, _ in rows]
+
+            # the first employee of each department manages it
+            managers = {}
+            for user_id, dept_id in employees:
+                managers.setdefault(dept_id, user_id)
+            manager_ids = set(managers.values())
+            User.groups.through.objects.bulk_create([
+                User.groups.through(user_id=user_id,
+                                    group_id=groups['MANAGER' if user_id in manager_ids else 'EMPLOYEE'].pk)
+                for user_id, _ in employees
+            ], batch_size=self.batch_size)
+        return [(user_id, dept_id, managers[dept_id]) for user_id, dept_id in employees]
+
+    def seed_leaves(self, employees, per_employee):
+        """Create non-overlapping leaves; returns {user_id: set of approved leave days}."""
+        rng, today = self.rng, self.today
+        span = (today + timedelta(days=60) - self.first_day).days
+        leave_days = {}
+
+        def rows():
+            for user_id, dept_id, manager_id in employees:
+                n = int(per_employee) + (rng.random() < per_employee % 1)
+                taken = leave_days.setdefault(user_id, set())
+                # one leave per slice of the period keeps them apart
+                slice_days = max(span // max(n, 1), 7)
+                for k in range(n):
+                    start = self.first_day + timedelta(days=k * slice_days + rng.randrange(max(slice_days - 6, 1)))
+                    end = start + timedelta(days=rng.choice((0, 0, 1, 2, 4)))
+                    if start > today:
+                        status, decided_by, decided_at = 'PENDING', None, None
+                    else:
+                        status = 'APPROVED' if rng.random() < 0.8 else 'REJECTED'
+                        decided_by = manager_id if manager_id != user_id else None
+                        decided_at = timezone.make_aware(datetime.combine(start - timedelta(days=2), datetime.min.time()))
+                    if status == 'APPROVED':
+                        taken.update(start + timedelta(days=d) for d in range((end - start).days + 1))
+                    yield Leave(employee_id=user_id, department_id=dept_id, start_date=start, end_date=end,
+                                status=status,
+                                reason=rng.choice(('Personal', 'Medical', 'Family event', 'Travel', 'Vacation')),
+                                decided_by_id=decided_by, decided_at=decided_at)
+
+        with transaction.atomic():
+            for batch in batches(rows(), self.batch_size):
+                Leave.objects.bulk_create(batch)
+        return leave_days
+
+    def seed_attendance(self, employees, leave_days):
+        rng = self.rng
+        statuses = [s for s, _ in STATUS_WEIGHTS]
+        weights = [w for _, w in STATUS_WEIGHTS]
+        days = list(_weekdays(self.first_day, self.today))
+
+        def rows():
+            for user_id, dept_id, manager_id in employees:
+                off = leave_days.get(user_id, ())
+                marks = rng.choices(statuses, weights, k=len(days))
+                for day, status in zip(days, marks):
+                    if day not in off:
+                        yield Attendance(employee_id=user_id, date=day, status=status, created_by_id=manager_id,
+                                         department_id=dept_id)
+
+        created = 0
+        with transaction.atomic():
+            for batch in batches(rows(), self.batch_size):
+                Attendance.objects.bulk_create(batch)
+                created += len(batch)
+        return created
+
+    def seed_sessions(self, employees, per_employee):
+        rng = self.rng
+        days = list(_weekdays(self.first_day, self.today))
+        tz = timezone.get_current_timezone()
+
+        def rows():
+            for user_id, _, _ in employees:
+                for day in sorted(rng.sample(days, min(per_employee, len(days)))):
+                    login = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(510, 600))
+                    login = timezone.make_aware(login, tz)
+                    logout = login + timedelta(minutes=rng.randrange(360, 600))
+                    yield UserSession(user_id=user_id, login_time=login,
+                                      logout_time=logout if logout < timezone.now() else None)
+
+        created = 0
+        with transaction.atomic():
+            for batch in batches(rows(), self.batch_size):
+                UserSession.objects.bulk_create(batch)
+                created += len(batch)
+        return created
@@ -0,0 +1,174 @@
+"""
+Opt-in request profiling (EMS_PROFILING).
+
+Every request gets a Server-Timing header with view, SQL and template time.
+If EMS_PROFILE_LOG is set, it also gets one JSON line in that file. Requests
+slower than EMS_PROFILE_SLOW_MS also log their most repeated SQL statements,
+which is how N+1 loops show up. Summarize the log with
+`manage.py profile_report`.
+
+Queries are attributed through a context variable rather than by wrapping
+the request thread's connections. sync_to_async copies the context into its
+worker threads, so queries that async views run there through
+core.aio.gather_queries are counted too.
+"""
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+_current = ContextVar('ems_profile', default=None)
+_write_lock = threading.Lock()
+
+
+class Profile:
+    def __init__(self, parent=None):
+        self.parent = parent  # an enclosing collect() also sees these queries
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.view_started = None
+        self.view = None
+        self.statements = defaultdict(lambda: [0, 0.0])  # sql -> [count, seconds]
+        self._depth = 0
+        self._lock = threading.Lock()  # queries arrive from several threads at once
+
+    def add_sql(self, sql, elapsed):
+        with self._lock:
+            self.queries += 1
+            self.sql += elapsed
+            # sql still has its %s placeholders, so an N+1 loop repeats one string
+            stat = self.statements[sql]
+            stat[0] += 1
+            stat[1] += elapsed
+
+    def duplicates(self, limit=5):
+        repeated = [(sql, n, t) for sql, (n, t) in self.statements.items() if n > 1]
+        repeated.sort(key=lambda item: (-item[1], -item[2]))
+        return [{'sql': sql[:500], 'count': n, 'ms': round(t * 1000, 2)} for sql, n, t in repeated[:limit]]
+
+
+def _record_sql(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        while profile is not None:
+            profile.add_sql(sql, elapsed)
+            profile = profile.parent
+
+
+def _install(connection, **kwargs):
+    if _record_sql not in connection.execute_wrappers:
+        # first, not last: execute_wrapper() blocks pop the last entry when they exit
+        connection.execute_wrappers.insert(0, _record_sql)
+
+
+@contextmanager
+def collect():
+    """
+    Profile the queries run in this context, on any thread and connection,
+    until the block exits. Yields the Profile.
+    """
+    # connections opened later (pool threads) get the wrapper as they connect
+    connection_created.connect(_install, dispatch_uid='ems_profile_sql')
+    for conn in connections.all():
+        _install(conn)
+    profile = Profile(parent=_current.get())
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def _patch_template_render():
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_ems_profiled', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context, request)
+        profile._depth += 1
+        started = perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            profile._depth -= 1
+            if not profile._depth:  # templates rendered inside a template are already counted
+                profile.template += perf_counter() - started
+
+    render._ems_profiled = True
+    Template.render = render
+
+
+class ProfilingMiddleware:
+    """Keep first in MIDDLEWARE so `total` covers every other middleware."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EMS_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log_path = getattr(settings, 'EMS_PROFILE_LOG', None)
+        self.slow_ms = getattr(settings, 'EMS_PROFILE_SLOW_MS', 500)
+        _patch_template_render()
+
+    def __call__(self, request):
+        started = perf_counter()
+        with collect() as profile:
+            response = self.get_response(request)
+        total = perf_counter() - started
+        if profile.view_started is not None:
+            profile.view = perf_counter() - profile.view_started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile.sql * 1000:.1f};desc="{profile.queries} queries"',
+            f'tpl;dur={profile.template * 1000:.1f}',
+            f'view;dur={(profile.view or 0) * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        if self.log_path:
+            self.log(request, response, profile, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_started = perf_counter()
+
+    def log(self, request, response, profile, total):
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'ts': timezone.now().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.path,
+            'url_name': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'view_ms': round((profile.view or 0) * 1000, 2),
+            'db_ms': round(profile.sql * 1000, 2),
+            'queries': profile.queries,
+            'tpl_ms': round(profile.template * 1000, 2),
+        }
+        if entry['total_ms'] >= self.slow_ms:
+            entry['slow'] = True
+            entry['duplicates'] = profile.duplicates()
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with _write_lock, open(self.log_path, 'a', encoding='utf-8') as fh:
+            fh.write(line)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_usersession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-date', '-id'], name='core_att_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['-applied_at', '-id'], name='core_leave_applied_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['-login_time', '-id'], name='core_sess_login_id_idx'),
+        ),
+        # employee_list pages over auth_user by name; auth is not ours to add Meta indexes to
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS core_user_name_idx ON auth_user (first_name, last_name, username, id)',
+            reverse_sql='DROP INDEX IF EXISTS core_user_name_idx',
+        ),
+    ]
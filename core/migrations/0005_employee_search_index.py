@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:26
+
+from django.db import OperationalError, migrations
+
+
+# Frozen copies of the SQL in core.search as of this migration; later edits
+# to that module must not change what this migration does.
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_employee_fts USING fts5("
+    "username, first_name, last_name, email, department, position, "
+    "tokenize='unicode61', prefix='2 3')"
+)
+DROP_SQL = "DROP TABLE IF EXISTS core_employee_fts"
+BACKFILL_SQL = (
+    "INSERT INTO core_employee_fts(rowid, username, first_name, last_name, email, department, position) "
+    "SELECT u.id, u.username, u.first_name, u.last_name, u.email, "
+    "COALESCE(d.name, ''), COALESCE(p.name, '') "
+    "FROM auth_user u "
+    "LEFT JOIN core_employeeprofile ep ON ep.user_id = u.id "
+    "LEFT JOIN core_department d ON d.id = ep.department_id "
+    "LEFT JOIN core_position p ON p.id = ep.position_id"
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(CREATE_SQL)
+    except OperationalError:
+        # SQLite built without FTS5: search keeps using LIKE filters
+        return
+    schema_editor.execute("DELETE FROM core_employee_fts")
+    schema_editor.execute(BACKFILL_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_counter'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_employee_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeprofile',
+            name='photo_thumbs',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_employeeprofile_photo_thumbs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='core_leave_emp_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['status', 'start_date'], name='core_leave_status_start_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_attendance_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'logout_time', 'login_time'], name='core_sess_user_open_idx'),
+        ),
+    ]
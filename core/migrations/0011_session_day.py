@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0010_usersession_open_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('seconds', models.PositiveIntegerField(default=0)),
+                ('first_login', models.DateTimeField()),
+                ('last_logout', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'user'], name='core_sessday_day_user_idx')],
+                'unique_together': {('user', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:03
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_departments(apps, schema_editor):
+    # one UPDATE ... SET department_id = (SELECT ...) per table
+    profiles = apps.get_model('core', 'EmployeeProfile').objects
+    for name in ('Attendance', 'ArchivedAttendance', 'Leave'):
+        apps.get_model('core', name).objects.update(department_id=Subquery(
+            profiles.filter(user_id=OuterRef('employee_id')).values('department_id')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedattendance',
+            name='department',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='department',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='leave',
+            name='department',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.department'),
+        ),
+        # fill before building the indexes: cheaper than maintaining them row by row
+        migrations.RunPython(backfill_departments, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='archivedattendance',
+            index=models.Index(fields=['department', '-date', '-id'], name='core_archatt_dept_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['department', '-date', '-id'], name='core_att_dept_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['department', '-applied_at', '-id'], name='core_leave_dept_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['department', 'status', '-applied_at'], name='core_leave_dept_status_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_running(apps, schema_editor):
+    # jobs RUNNING during the upgrade count as alive from when they started
+    Job = apps.get_model('core', 'Job')
+    Job.objects.filter(status='RUNNING').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_department_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life from the worker running it', null=True),
+        ),
+        migrations.RunPython(stamp_running, migrations.RunPython.noop),
+    ]
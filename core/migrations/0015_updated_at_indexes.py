@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['department', 'updated_at'], name='core_att_dept_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['updated_at'], name='core_att_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['department', 'updated_at'], name='core_leave_dept_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['updated_at'], name='core_leave_updated_idx'),
+        ),
+    ]
@@ -28,6 +28,8 @@ class EmployeeProfile(models.Model):
     position = models.ForeignKey(Position, on_delete=models.SET_NULL, null=True, blank=True)
     phone = models.CharField(max_length=20, blank=True)
     photo = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    photo_thumbs = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.get_full_name() or self.user.username
@@ -43,14 +45,62 @@ class Attendance(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PRESENT')
     remarks = models.CharField(max_length=255, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='attendance_marked')
+    updated_at = models.DateTimeField(auto_now=True)
+    # the employee's current department, for single-table manager scoping (core.departments)
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   editable=False, related_name='+', db_index=False)
 
     class Meta:
         unique_together = ('employee', 'date')
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='core_att_date_id_idx'),
+            models.Index(fields=['department', '-date', '-id'], name='core_att_dept_date_idx'),
+            # COUNT/MAX(updated_at) validators of core.conditional, per department and overall
+            models.Index(fields=['department', 'updated_at'], name='core_att_dept_updated_idx'),
+            models.Index(fields=['updated_at'], name='core_att_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.username} - {self.date} - {self.status}"
 
+class ArchivedAttendance(models.Model):
+    """Attendance moved out of the hot table by archive_attendance; ids are kept."""
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_attendances')
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=Attendance.STATUS_CHOICES)
+    remarks = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    updated_at = models.DateTimeField()
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   editable=False, related_name='+', db_index=False)
+
+    class Meta:
+        unique_together = ('employee', 'date')
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='core_archatt_date_id_idx'),
+            models.Index(fields=['department', '-date', '-id'], name='core_archatt_dept_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.username} - {self.date} - {self.status} (archived)"
+
+class AttendanceMonth(models.Model):
+    """Per-employee status counts for one archived month."""
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_months')
+    month = models.DateField()  # first day of the month
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('employee', 'month')
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.employee.username} {self.month:%Y-%m}: {self.present}P {self.absent}A {self.late}L"
+
 class Leave(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -65,13 +115,34 @@ class Leave(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True)
     decided_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='leaves_decided')
     decided_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # the employee's current department, for single-table manager scoping (core.departments)
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   editable=False, related_name='+', db_index=False)
 
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['-applied_at', '-id'], name='core_leave_applied_id_idx'),
+            models.Index(fields=['employee', 'start_date', 'end_date'], name='core_leave_emp_range_idx'),
+            models.Index(fields=['status', 'start_date'], name='core_leave_status_start_idx'),
+            models.Index(fields=['department', '-applied_at', '-id'], name='core_leave_dept_applied_idx'),
+            models.Index(fields=['department', 'status', '-applied_at'], name='core_leave_dept_status_idx'),
+            models.Index(fields=['department', 'updated_at'], name='core_leave_dept_updated_idx'),
+            models.Index(fields=['updated_at'], name='core_leave_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.username} {self.start_date}→{self.end_date} ({self.status})"
 
+class Counter(models.Model):
+    """Precomputed dashboard count, see core.counters for the key scheme."""
+    key = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
 
 from django.contrib.auth.models import User
 from django.db import models
@@ -82,11 +153,18 @@ class UserSession(models.Model):
     login_time = models.DateTimeField(default=timezone.now)
     logout_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-login_time', '-id'], name='core_sess_login_id_idx'),
+            # logout closes the user's latest open session
+            models.Index(fields=['user', 'logout_time', 'login_time'], name='core_sess_user_open_idx'),
+        ]
+
     @property
     def duration_human(self):
         if self.logout_time:
             delta = self.logout_time - self.login_time
-            hours, remainder = divmod(delta.seconds, 3600)
+            hours, remainder = divmod(int(delta.total_seconds()), 3600)
             minutes, seconds = divmod(remainder, 60)
             return f"{hours}h {minutes}m {seconds}s"
         return "In progress"
@@ -94,12 +172,63 @@ class UserSession(models.Model):
     @property
     def role(self):
         """Return the group name (role) of the user"""
-        if self.user.is_superuser:
-            return "ADMIN"
-        groups = self.user.groups.values_list('name', flat=True)
-        if groups:
-            return ', '.join(groups)  # handles multiple groups
-        return "No Role"
+        from .roles import roles_for_user
+        return roles_for_user(self.user).label  # handles multiple groups
 
     def __str__(self):
         return f"{self.user.username} | {self.login_time} - {self.logout_time or 'Active'}"
+
+
+class SessionDay(models.Model):
+    """Time one user spent logged in on one local day, from closed sessions (core.rollups)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_days')
+    day = models.DateField()
+    sessions = models.PositiveIntegerField(default=0)
+    seconds = models.PositiveIntegerField(default=0)
+    first_login = models.DateTimeField()  # clipped to the day, like seconds
+    last_logout = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'day')
+        indexes = [
+            models.Index(fields=['day', 'user'], name='core_sessday_day_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.day}: {self.sessions} sessions, {self.seconds}s"
+
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+class Job(models.Model):
+    """A queued call of a core.jobs task, run by `manage.py run_worker`."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    timeout = models.PositiveIntegerField(help_text="Seconds")
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the worker running it")
+
+    class Meta:
+        indexes = [
+            # the claim query: oldest due PENDING jobs first
+            models.Index(fields=['status', 'run_at', 'id'], name='core_job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.name} ({self.status})"
@@ -0,0 +1,175 @@
+import base64
+import json
+from functools import cmp_to_key
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def page_size_for(request, default=None):
+    default = default or getattr(settings, 'EMS_PAGE_SIZE', 50)
+    limit = getattr(settings, 'EMS_MAX_PAGE_SIZE', 500)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, limit))
+
+
+def _normalize(queryset, ordering):
+    """Split ordering into (field, descending) pairs, with pk as final tie-breaker."""
+    pk_name = queryset.model._meta.pk.name
+    keys = []
+    for field in ordering:
+        desc = field.startswith('-')
+        name = field.lstrip('-')
+        keys.append((pk_name if name == 'pk' else name, desc))
+    if keys[-1][0] != pk_name:
+        keys.append((pk_name, keys[-1][1]))
+    return keys
+
+
+def _row_value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def encode_cursor(direction, values):
+    values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+    raw = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _to_python(queryset, name, value):
+    try:
+        field = queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # annotation (e.g. a search rank); JSON already restored its type
+        if name not in queryset.query.annotations:
+            raise ValueError(name)
+        return value
+    return field.to_python(value)
+
+
+def decode_cursor(queryset, keys, cursor):
+    """Return (direction, values) or None if the cursor is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, values = data['d'], data['v']
+        if direction not in ('n', 'p') or len(values) != len(keys):
+            return None
+        values = [_to_python(queryset, name, v) for (name, _), v in zip(keys, values)]
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None
+    return direction, values
+
+
+def _seek(keys, values, forward):
+    # (a, b, pk) > (x, y, z) expanded into OR-ed prefixes so every branch is an index range
+    q = Q()
+    for i, (name, desc) in enumerate(keys):
+        lookup = 'lt' if desc == forward else 'gt'
+        cond = Q(**{f'{name}__{lookup}': values[i]})
+        for (prev_name, _), prev_value in zip(keys[:i], values[:i]):
+            cond &= Q(**{prev_name: prev_value})
+        q |= cond
+    return q
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, prev_cursor, params, page_size):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.page_size = page_size
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _query(self, cursor):
+        params = self._params.copy()
+        params['cursor'] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def previous_query(self):
+        return self._query(self.prev_cursor) if self.prev_cursor else ''
+
+
+def _merge(keys, forward, *row_lists):
+    """Combine row lists that are each already in fetch order."""
+    def compare(a, b):
+        for name, desc in keys:
+            x, y = _row_value(a, name), _row_value(b, name)
+            if x != y:
+                # fetch order is descending exactly when desc == forward
+                return (1 if x < y else -1) if desc == forward else (-1 if x < y else 1)
+        return 0
+    return sorted((row for rows in row_lists for row in rows), key=cmp_to_key(compare))
+
+
+def keyset_paginate(request, queryset, ordering, page_size=None, fallback=None):
+    """
+    Cursor pagination over `ordering` (e.g. ['-date']). Pages are fetched with a
+    WHERE seek on the sort key instead of OFFSET, so cost does not grow with depth.
+    `fallback` is a second queryset with the same sort fields (e.g. an archive
+    table) whose rows are merged in as if both were one table.
+    """
+    size = page_size or page_size_for(request)
+    keys = _normalize(queryset, ordering)
+    decoded = decode_cursor(queryset, keys, request.GET.get('cursor'))
+    forward = decoded is None or decoded[0] == 'n'
+
+    order = [('-' if desc == forward else '') + name for name, desc in keys]
+
+    def fetch(qs):
+        qs = qs.order_by(*order)
+        if decoded is not None:
+            qs = qs.filter(_seek(keys, decoded[1], forward))
+        return list(qs[:size + 1])
+
+    rows = fetch(queryset)
+    if fallback is not None:
+        rows = _merge(keys, forward, rows, fetch(fallback))[:size + 1]
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if forward:
+        has_next, has_prev = has_more, decoded is not None
+    else:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+
+    def key_of(row):
+        return [_row_value(row, name) for name, _ in keys]
+
+    next_cursor = encode_cursor('n', key_of(rows[-1])) if rows and has_next else None
+    prev_cursor = encode_cursor('p', key_of(rows[0])) if rows and has_prev else None
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    return KeysetPage(rows, next_cursor, prev_cursor, params, size)
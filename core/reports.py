@@ -0,0 +1,157 @@
+"""
+Monthly department attendance matrix.
+
+The month is loaded with one values_list query per table into an
+employee x day int8 grid; leave overlays and totals are NumPy operations,
+so cost is dominated by the queries rather than Python loops. The three
+queries are independent: aattendance_matrix() runs them concurrently.
+"""
+import calendar
+from datetime import date
+from functools import partial
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db.models import Case, IntegerField, Value, When
+
+from . import archive
+from .aio import gather_queries
+from .models import ArchivedAttendance, Attendance, Leave
+
+NONE, PRESENT, ABSENT, LATE, LEAVE = range(5)
+CODES = {'PRESENT': PRESENT, 'ABSENT': ABSENT, 'LATE': LATE}
+LABELS = {NONE: '', PRESENT: 'P', ABSENT: 'A', LATE: 'L', LEAVE: 'V'}
+NAMES = {PRESENT: 'present', ABSENT: 'absent', LATE: 'late', LEAVE: 'leave'}
+
+
+class AttendanceMatrix:
+    def __init__(self, year, month, employees, grid):
+        self.year = year
+        self.month = month
+        self.employees = employees  # [(id, username, full name)], row order of grid
+        self.grid = grid
+
+    @property
+    def days(self):
+        return list(range(1, self.grid.shape[1] + 1))
+
+    def totals(self):
+        """Per-employee counts, one array per status."""
+        return {name: (self.grid == code).sum(axis=1) for code, name in NAMES.items()}
+
+    def day_totals(self):
+        return {name: (self.grid == code).sum(axis=0) for code, name in NAMES.items()}
+
+    def rows(self):
+        """Template-friendly rows: (employee tuple, [cell labels], {status: count})."""
+        labels = np.array([LABELS[c] for c in sorted(LABELS)], dtype=object)[self.grid]
+        totals = self.totals()
+        for i, emp in enumerate(self.employees):
+            yield emp, list(labels[i]), {name: int(totals[name][i]) for name in NAMES.values()}
+
+    def as_dict(self):
+        totals = self.totals()
+        return {
+            'year': self.year,
+            'month': self.month,
+            'days': self.grid.shape[1],
+            'legend': {v: NAMES.get(k, 'unmarked') for k, v in LABELS.items() if v},
+            'employees': [
+                {
+                    'id': emp_id,
+                    'username': username,
+                    'name': name,
+                    'days': ''.join(LABELS[c] or '-' for c in self.grid[i]),
+                    'totals': {k: int(v[i]) for k, v in totals.items()},
+                }
+                for i, (emp_id, username, name) in enumerate(self.employees)
+            ],
+            'day_totals': {k: v.tolist() for k, v in self.day_totals().items()},
+        }
+
+
+def _month_bounds(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _load_employees(department_id):
+    return [
+        (pk, username, f'{first_name} {last_name}'.strip() or username)
+        for pk, username, first_name, last_name in
+        User.objects.filter(profile__department_id=department_id)
+        .order_by('first_name', 'last_name', 'username')
+        .values_list('pk', 'username', 'first_name', 'last_name')
+    ]
+
+
+def _load_marks(department_id, first, last):
+    models = [ArchivedAttendance, Attendance] if archive.covers(first) else [Attendance]
+    return [
+        mark
+        for model in models
+        for mark in model.objects.filter(department_id=department_id, date__range=(first, last))
+        .annotate(code=Case(*[When(status=s, then=Value(c)) for s, c in CODES.items()],
+                            default=Value(NONE), output_field=IntegerField()))
+        .order_by()
+        .values_list('employee_id', 'date__day', 'code')
+    ]
+
+
+def _load_leaves(department_id, first, last):
+    return [
+        (emp_id, max(start, first).day, min(end, last).day)
+        for emp_id, start, end in
+        Leave.objects.filter(department_id=department_id, status='APPROVED',
+                             start_date__lte=last, end_date__gte=first)
+        .order_by().values_list('employee_id', 'start_date', 'end_date')
+    ]
+
+
+def _assemble(year, month, employees, marks, leaves):
+    ndays = calendar.monthrange(year, month)[1]
+    grid = np.zeros((len(employees), ndays), dtype=np.int8)
+    if not employees:
+        return AttendanceMatrix(year, month, employees, grid)
+
+    ids = np.array([e[0] for e in employees], dtype=np.int64)
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+
+    def row_index(emp_ids):
+        return order[np.searchsorted(sorted_ids, emp_ids)]
+
+    marks = np.array(marks, dtype=np.int64).reshape(-1, 3)
+    if len(marks):
+        grid[row_index(marks[:, 0]), marks[:, 1] - 1] = marks[:, 2]
+
+    leaves = np.array(leaves, dtype=np.int64).reshape(-1, 3)
+    if len(leaves):
+        # difference array: +1 at each leave start, -1 after its end, then cumsum
+        edges = np.zeros((len(employees), ndays + 1), dtype=np.int32)
+        rows = row_index(leaves[:, 0])
+        np.add.at(edges, (rows, leaves[:, 1] - 1), 1)
+        np.add.at(edges, (rows, leaves[:, 2]), -1)
+        on_leave = np.cumsum(edges, axis=1)[:, :ndays] > 0
+        # an approved leave explains an unmarked day or a recorded absence
+        grid[on_leave & ((grid == NONE) | (grid == ABSENT))] = LEAVE
+
+    return AttendanceMatrix(year, month, employees, grid)
+
+
+def attendance_matrix(department_id, year, month):
+    first, last = _month_bounds(year, month)
+    employees = _load_employees(department_id)
+    if not employees:
+        return _assemble(year, month, employees, [], [])
+    return _assemble(year, month, employees,
+                     _load_marks(department_id, first, last), _load_leaves(department_id, first, last))
+
+
+async def aattendance_matrix(department_id, year, month):
+    first, last = _month_bounds(year, month)
+    employees, marks, leaves = await gather_queries(
+        partial(_load_employees, department_id),
+        partial(_load_marks, department_id, first, last),
+        partial(_load_leaves, department_id, first, last),
+    )
+    return _assemble(year, month, employees, marks, leaves)
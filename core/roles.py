@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .models import EmployeeProfile
+
+ROLE_ORDER = ('ADMIN', 'MANAGER', 'EMPLOYEE')
+
+
+def _cache_key(user_id):
+    return f'ems:roles:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'EMS_ROLE_CACHE_TIMEOUT', 300)
+
+
+class RoleInfo:
+    """Resolved groups and department for one user."""
+
+    def __init__(self, user, groups, department_id):
+        self.is_superuser = user.is_superuser
+        self.groups = frozenset(groups)
+        self.department_id = department_id
+
+    @property
+    def role(self):
+        if self.is_superuser:
+            return 'ADMIN'
+        for name in ROLE_ORDER:
+            if name in self.groups:
+                return name
+        return None
+
+    @property
+    def label(self):
+        # matches the historic UserSession.role text
+        if self.is_superuser:
+            return 'ADMIN'
+        return ', '.join(sorted(self.groups)) or 'No Role'
+
+    def has_any(self, *names):
+        return self.is_superuser or bool(self.groups.intersection(names))
+
+    @property
+    def is_manager(self):
+        return not self.is_superuser and 'MANAGER' in self.groups
+
+    @property
+    def scope_department_id(self):
+        """Department a manager is limited to, or None for unrestricted viewers."""
+        return self.department_id if self.is_manager else None
+
+
+def _load_many(users):
+    users = [u for u in users if u.is_authenticated]
+    keys = {_cache_key(u.pk): u for u in users}
+    cached = cache.get_many(keys.keys())
+    missing = [u.pk for key, u in keys.items() if key not in cached]
+    if missing:
+        fresh = {pk: {'groups': [], 'department_id': None} for pk in missing}
+        for user_id, name in User.groups.through.objects.filter(
+                user_id__in=missing).values_list('user_id', 'group__name'):
+            fresh[user_id]['groups'].append(name)
+        for user_id, dept_id in EmployeeProfile.objects.filter(
+                user_id__in=missing).values_list('user_id', 'department_id'):
+            fresh[user_id]['department_id'] = dept_id
+        cache.set_many({_cache_key(pk): data for pk, data in fresh.items()}, _timeout())
+        cached.update({_cache_key(pk): data for pk, data in fresh.items()})
+    for key, user in keys.items():
+        data = cached[key]
+        user._ems_roles = RoleInfo(user, data['groups'], data['department_id'])
+
+
+def prime_roles(users):
+    """Resolve roles for many users with one cache round-trip and at most two queries."""
+    _load_many([u for u in users if not hasattr(u, '_ems_roles')])
+
+
+def roles_for_user(user):
+    if not hasattr(user, '_ems_roles'):
+        if not user.is_authenticated:
+            return RoleInfo(user, (), None)
+        _load_many([user])
+    return user._ems_roles
+
+
+def get_roles(request):
+    """Roles of request.user, memoized on the request."""
+    roles = getattr(request, '_ems_roles', None)
+    if roles is None:
+        roles = request._ems_roles = roles_for_user(request.user)
+    return roles
+
+
+def invalidate_roles(*user_ids):
+    cache.delete_many([_cache_key(pk) for pk in user_ids])
@@ -0,0 +1,110 @@
+"""
+Per-user, per-day session totals (SessionDay).
+
+A closed session is split at local midnight and each piece is added to the
+day it falls on, so a night shift counts towards both days. core.session_log
+adds sessions as they close, with an additive upsert; `manage.py
+rollup_sessions` rebuilds the table from UserSession. Open sessions are not
+counted until they close.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import SessionDay, UserSession
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def pieces(login, logout):
+    """(local day, start, end) for every day the session touches."""
+    start, end = timezone.localtime(login), timezone.localtime(logout)
+    if end <= start:
+        yield start.date(), start, start
+        return
+    while start < end:
+        piece_end = min(end, local_midnight(start.date() + timedelta(days=1)))
+        yield start.date(), start, piece_end
+        start = piece_end
+
+
+def totals(sessions, since=None):
+    """{(user_id, day): [sessions, seconds, first_login, last_logout]} for closed sessions."""
+    out = {}
+    for s in sessions:
+        for day, start, end in pieces(s.login_time, s.logout_time):
+            if since and day < since:
+                continue
+            row = out.get((s.user_id, day))
+            if row is None:
+                out[s.user_id, day] = [1, int((end - start).total_seconds()), start, end]
+            else:
+                row[0] += 1
+                row[1] += int((end - start).total_seconds())
+                row[2] = min(row[2], start)
+                row[3] = max(row[3], end)
+    return out
+
+
+def add(sessions, since=None):
+    """Add closed sessions to their days; call inside the transaction that closed them."""
+    rows = totals(sessions, since)
+    if not rows:
+        return
+    ops = connection.ops
+    table = SessionDay._meta.db_table
+    # bulk_create(update_conflicts=True) can only overwrite columns, not add to them
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (user_id, day, sessions, seconds, first_login, last_logout) "
+            "VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (user_id, day) DO UPDATE SET "
+            "sessions = sessions + excluded.sessions, seconds = seconds + excluded.seconds, "
+            "first_login = min(first_login, excluded.first_login), "
+            "last_logout = max(last_logout, excluded.last_logout)",
+            [
+                (user_id, ops.adapt_datefield_value(day), n, seconds,
+                 ops.adapt_datetimefield_value(first), ops.adapt_datetimefield_value(last))
+                for (user_id, day), (n, seconds, first, last) in rows.items()
+            ],
+        )
+
+
+def rebuild(since=None, batch_size=5000):
+    """Recompute SessionDay rows from `since` (a date; None: all history). Returns sessions read."""
+    days = SessionDay.objects.all()
+    sessions = UserSession.objects.filter(logout_time__isnull=False)
+    if since:
+        days = days.filter(day__gte=since)
+        sessions = sessions.filter(logout_time__gt=local_midnight(since))
+    read = 0
+    with transaction.atomic():
+        days.delete()
+        batch = []
+        for s in sessions.only('user_id', 'login_time', 'logout_time').iterator(chunk_size=batch_size):
+            batch.append(s)
+            if len(batch) >= batch_size:
+                add(batch, since)
+                read += len(batch)
+                batch = []
+        add(batch, since)
+        read += len(batch)
+    return read
+
+
+def weekly_hours(start, end, department_id=None):
+    """One GROUP BY over SessionDay: per user and ISO week between two dates."""
+    days = SessionDay.objects.filter(day__gte=start, day__lte=end)
+    if department_id:
+        days = days.filter(user__profile__department_id=department_id)
+    return (
+        days.annotate(week=TruncWeek('day')).order_by()
+        .values('user_id', 'user__username', 'user__first_name', 'user__last_name', 'week')
+        .annotate(sessions=Sum('sessions'), seconds=Sum('seconds'),
+                  first_login=Min('first_login'), last_logout=Max('last_logout'))
+    )
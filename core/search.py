@@ -0,0 +1,116 @@
+"""
+Employee search backed by an SQLite FTS5 table (core_employee_fts).
+
+One row per auth_user, rowid = user id, holding the searchable text of the
+user and their profile. Signals keep it current; 'manage.py rebuild_search_index'
+rebuilds it. On databases without the table (non-SQLite, or FTS5 missing) the
+helpers fall back to the old icontains filters.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'core_employee_fts'
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "username, first_name, last_name, email, department, position, "
+    "tokenize='unicode61', prefix='2 3')"
+)
+DROP_SQL = f"DROP TABLE IF EXISTS {TABLE}"
+
+_SOURCE_SQL = (
+    "SELECT u.id, u.username, u.first_name, u.last_name, u.email, "
+    "COALESCE(d.name, ''), COALESCE(p.name, '') "
+    "FROM auth_user u "
+    "LEFT JOIN core_employeeprofile ep ON ep.user_id = u.id "
+    "LEFT JOIN core_department d ON d.id = ep.department_id "
+    "LEFT JOIN core_position p ON p.id = ep.position_id"
+)
+_INSERT_SQL = (
+    f"INSERT INTO {TABLE}(rowid, username, first_name, last_name, email, department, position) "
+)
+
+
+_enabled = False
+
+
+def is_enabled():
+    global _enabled
+    if not _enabled and connection.vendor == 'sqlite':
+        # only a positive answer is remembered; the table can appear after migrate
+        _enabled = TABLE in connection.introspection.table_names()
+    return _enabled
+
+
+def match_expression(q):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r'\w+', q)
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def reindex(user_ids=None):
+    """Rewrite index rows for the given users (all users when None)."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        if user_ids is None:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            cursor.execute(_INSERT_SQL + _SOURCE_SQL)
+            return
+        for chunk in _chunks({pk for pk in user_ids if pk is not None}):
+            marks = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({marks})", chunk)
+            cursor.execute(_INSERT_SQL + _SOURCE_SQL + f" WHERE u.id IN ({marks})", chunk)
+
+
+def remove(*user_ids):
+    if not is_enabled() or not user_ids:
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(user_ids):
+            marks = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({marks})", chunk)
+
+
+def user_filter(q, prefix=''):
+    """
+    Q object matching users for `q`. `prefix` is the path to the user from the
+    filtered model, e.g. 'employee__' for Attendance.
+    """
+    if not is_enabled():
+        return (
+            Q(**{f'{prefix}username__icontains': q}) |
+            Q(**{f'{prefix}first_name__icontains': q}) |
+            Q(**{f'{prefix}last_name__icontains': q}) |
+            Q(**{f'{prefix}email__icontains': q})
+        )
+    expr = match_expression(q)
+    if not expr:
+        return Q(pk__in=[])
+    field = f'{prefix}id__in' if prefix else 'pk__in'
+    return Q(**{field: RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [expr])})
+
+
+def search_users(users, q):
+    """
+    Filter a User queryset by `q` and annotate `rank` (lower is better).
+    Returns (queryset, ordering) for keyset_paginate.
+    """
+    users = users.filter(user_filter(q))
+    expr = match_expression(q)
+    if not is_enabled() or not expr:
+        return users, ['first_name', 'last_name', 'username']
+    rank = RawSQL(
+        f"SELECT bm25({TABLE}) FROM {TABLE} WHERE {TABLE} MATCH %s AND {TABLE}.rowid = auth_user.id",
+        [expr], output_field=FloatField(),
+    )
+    return users.annotate(rank=rank), ['rank']
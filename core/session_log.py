@@ -0,0 +1,125 @@
+"""
+Buffered UserSession writes for the login/logout signals.
+
+Events are appended to an in-memory buffer and written by one background
+thread every EMS_SESSION_FLUSH_SECONDS, or as soon as EMS_SESSION_BATCH_SIZE
+events are waiting. Logins become one bulk_create and logouts one
+bulk_update, so a burst of logins at shift start costs one SQLite write
+instead of one per request. Whatever is still buffered is flushed at
+interpreter exit. Set EMS_SESSION_BUFFER = False to write inline.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import rollups
+from .models import UserSession
+
+logger = logging.getLogger(__name__)
+
+LOGIN, LOGOUT = 'login', 'logout'
+MAX_ATTEMPTS = 3
+
+_events = []  # (kind, user_id, when, attempts)
+_lock = threading.Lock()        # guards _events
+_flush_lock = threading.Lock()  # one writer at a time
+_wakeup = threading.Event()
+_thread = None
+
+
+def _batch_size():
+    return getattr(settings, 'EMS_SESSION_BATCH_SIZE', 500)
+
+
+def _ensure_thread():
+    global _thread
+    if _thread is not None:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='session-log', daemon=True)
+            _thread.start()
+            atexit.register(flush)
+
+
+def _run():
+    interval = getattr(settings, 'EMS_SESSION_FLUSH_SECONDS', 1.0)
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            flush()
+        finally:
+            close_old_connections()
+
+
+def record(kind, user_id, when=None):
+    event = (kind, user_id, when or timezone.now(), 0)
+    if not getattr(settings, 'EMS_SESSION_BUFFER', True):
+        _write([event])
+        return
+    with _lock:
+        _events.append(event)
+        waiting = len(_events)
+    _ensure_thread()
+    if waiting >= _batch_size():
+        _wakeup.set()
+
+
+def flush():
+    """Write everything buffered so far; returns the number of events written."""
+    with _flush_lock:
+        with _lock:
+            batch = _events[:]
+            _events.clear()
+        if not batch:
+            return 0
+        try:
+            _write(batch)
+        except Exception:
+            logger.exception("Writing %d session events failed", len(batch))
+            retry = [(k, u, t, n + 1) for k, u, t, n in batch if n + 1 < MAX_ATTEMPTS]
+            with _lock:
+                _events[:0] = retry
+            return 0
+        return len(batch)
+
+
+def _write(batch):
+    new = []
+    open_new = defaultdict(list)  # user_id -> sessions opened in this batch, still open
+    closes = defaultdict(list)  # user_id -> logout times for open sessions already stored
+    for kind, user_id, when, _ in batch:
+        if kind == LOGIN:
+            session = UserSession(user_id=user_id, login_time=when)
+            new.append(session)
+            open_new[user_id].append(session)
+        elif open_new[user_id]:
+            open_new[user_id].pop().logout_time = when
+        else:
+            closes[user_id].append(when)
+
+    with transaction.atomic():
+        closed = []
+        for user_id, times in closes.items():
+            # each logout closes the latest session still open, as it would have inline
+            found = (UserSession.objects.filter(user_id=user_id, logout_time__isnull=True)
+                     .order_by('-login_time').values_list('pk', 'login_time')[:len(times)])
+            closed += [
+                UserSession(pk=pk, user_id=user_id, login_time=login_time, logout_time=when)
+                for (pk, login_time), when in zip(found, times)
+            ]
+        if closed:
+            UserSession.objects.bulk_update(closed, ['logout_time'])
+        if new:
+            # a user deleted while the event waited would fail the whole batch
+            existing = set(User.objects.filter(pk__in={s.user_id for s in new}).values_list('pk', flat=True))
+            new = [s for s in new if s.user_id in existing]
+            UserSession.objects.bulk_create(new)
+        rollups.add(closed + [s for s in new if s.logout_time])
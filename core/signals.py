@@ -1,17 +1,184 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.utils import timezone
-from .models import UserSession
+from . import session_log
 
 def login_handler(sender, request, user, **kwargs):
-    UserSession.objects.create(user=user, login_time=timezone.now())
+    session_log.record(session_log.LOGIN, user.pk)
 
 def logout_handler(sender, request, user, **kwargs):
-    try:
-        session = UserSession.objects.filter(user=user, logout_time__isnull=True).latest('login_time')
-        session.logout_time = timezone.now()
-        session.save()
-    except UserSession.DoesNotExist:
-        pass
+    if user is not None and user.pk:
+        session_log.record(session_log.LOGOUT, user.pk)
 
 user_logged_in.connect(login_handler)
 user_logged_out.connect(logout_handler)
+
+
+# --- Role cache invalidation ---
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from .models import EmployeeProfile
+from .roles import invalidate_roles
+
+def invalidate_on_commit(user_ids):
+    # before commit, a concurrent request would re-cache the old groups/department
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: invalidate_roles(*user_ids))
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_on_commit([instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        invalidate_on_commit(pk_set)
+    elif action == 'pre_clear':
+        # group.user_set.clear(): members are unknown once the rows are gone
+        invalidate_on_commit(instance.user_set.values_list('pk', flat=True))
+
+def profile_changed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.user_id])
+
+m2m_changed.connect(user_groups_changed, sender=User.groups.through)
+post_save.connect(profile_changed, sender=EmployeeProfile)
+post_delete.connect(profile_changed, sender=EmployeeProfile)
+
+
+# --- Dashboard counters ---
+from django.db.models.signals import pre_save
+from . import counters
+from .models import Attendance, Department, Leave
+
+def attendance_changed(sender, instance, **kwargs):
+    counters.touch('user', 'attendance', instance.employee_id)
+
+def leave_changed(sender, instance, **kwargs):
+    counters.touch('global', 'leaves_pending')
+    counters.touch('user', 'leaves_pending', instance.employee_id)
+
+def profile_department_before(sender, instance, **kwargs):
+    # remember the old department so both sides of a move get recounted
+    instance._old_department_id = None
+    if instance.pk:
+        instance._old_department_id = (
+            EmployeeProfile.objects.filter(pk=instance.pk).values_list('department_id', flat=True).first()
+        )
+
+def profile_department_changed(sender, instance, **kwargs):
+    counters.touch('dept', 'employees', instance.department_id, getattr(instance, '_old_department_id', None))
+
+def department_changed(sender, instance, created=False, **kwargs):
+    if created or kwargs.get('signal') is post_delete:
+        counters.touch('global', 'departments')
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # logins save last_login only; that never changes the head count
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    counters.touch('global', 'employees')
+
+post_save.connect(attendance_changed, sender=Attendance)
+post_delete.connect(attendance_changed, sender=Attendance)
+post_save.connect(leave_changed, sender=Leave)
+post_delete.connect(leave_changed, sender=Leave)
+pre_save.connect(profile_department_before, sender=EmployeeProfile)
+post_save.connect(profile_department_changed, sender=EmployeeProfile)
+post_delete.connect(profile_department_changed, sender=EmployeeProfile)
+post_save.connect(department_changed, sender=Department)
+post_delete.connect(department_changed, sender=Department)
+post_save.connect(user_changed, sender=User)
+post_delete.connect(user_changed, sender=User)
+
+
+# --- Employee search index ---
+from django.db.models.signals import pre_delete
+from . import search
+from .models import Position
+
+def user_search_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    search.reindex([instance.pk])
+
+def user_search_removed(sender, instance, **kwargs):
+    search.remove(instance.pk)
+
+def profile_search_changed(sender, instance, **kwargs):
+    search.reindex([instance.user_id])
+
+def members_before_delete(sender, instance, **kwargs):
+    # SET_NULL on profiles bypasses signals; note who loses the name
+    field = 'department' if sender is Department else 'position'
+    instance._search_user_ids = list(
+        EmployeeProfile.objects.filter(**{field: instance}).values_list('user_id', flat=True)
+    )
+
+def members_search_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    ids = getattr(instance, '_search_user_ids', None)
+    if ids is None:
+        field = 'department' if sender is Department else 'position'
+        ids = EmployeeProfile.objects.filter(**{field: instance}).values_list('user_id', flat=True)
+    search.reindex(ids)
+
+post_save.connect(user_search_changed, sender=User)
+post_delete.connect(user_search_removed, sender=User)
+post_save.connect(profile_search_changed, sender=EmployeeProfile)
+post_delete.connect(profile_search_changed, sender=EmployeeProfile)
+for _model in (Department, Position):
+    pre_delete.connect(members_before_delete, sender=_model)
+    post_save.connect(members_search_changed, sender=_model)
+    post_delete.connect(members_search_changed, sender=_model)
+
+
+# --- Profile photo thumbnails ---
+from . import thumbnails
+
+def profile_photo_saved(sender, instance, **kwargs):
+    thumbnails.schedule(instance)
+
+post_save.connect(profile_photo_saved, sender=EmployeeProfile)
+
+
+# --- SQLite connection tuning ---
+from django.db.backends.signals import connection_created
+from .db import configure_sqlite
+
+connection_created.connect(configure_sqlite)
+
+
+# --- Template fragment versions ---
+from . import fragments
+
+def model_changed(sender, instance, update_fields=None, **kwargs):
+    if sender is User and update_fields and set(update_fields) <= {'last_login'}:
+        return
+    fragments.bump(sender._meta.model_name)
+
+for _model in (User, Department, Position, EmployeeProfile, Attendance, Leave):
+    post_save.connect(model_changed, sender=_model)
+    post_delete.connect(model_changed, sender=_model)
+
+
+# --- Employee's department on attendance and leaves ---
+from . import departments
+
+def row_department(sender, instance, **kwargs):
+    instance.department_id = departments.of([instance.employee_id]).get(instance.employee_id)
+
+def _department_pk(value):
+    # an id assigned from form data is still a string until the instance is reloaded
+    return int(value) if value not in (None, '') else None
+
+def profile_department_moved(sender, instance, created=False, **kwargs):
+    if kwargs.get('signal') is post_delete:
+        departments.move(instance.user_id, None)
+        return
+    department_id = _department_pk(instance.department_id)
+    if created or department_id != getattr(instance, '_old_department_id', None):
+        departments.move(instance.user_id, department_id)
+        fragments.bump('attendance', 'leave')
+
+for _model in (Attendance, Leave):
+    pre_save.connect(row_department, sender=_model)
+post_save.connect(profile_department_moved, sender=EmployeeProfile)
+post_delete.connect(profile_department_moved, sender=EmployeeProfile)
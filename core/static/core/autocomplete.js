@@ -0,0 +1,58 @@
+// Lazy selects rendered by core.forms.AutocompleteSelect: a search box above
+// each <select data-autocomplete> refills its options from the JSON endpoint.
+(function () {
+  function setup(select) {
+    var form = select.form;
+    var dependsOn = select.dataset.dependsOn && form.elements[select.dataset.dependsOn];
+    var search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control form-control-sm mb-1';
+    search.placeholder = 'Type to search…';
+    search.autocomplete = 'off';
+    select.parentNode.insertBefore(search, select);
+
+    var timer = null;
+    var loaded = false;
+
+    function fill(results) {
+      var current = select.value;
+      var keep = current ? select.querySelector('option[value="' + current + '"]') : null;
+      var blank = select.querySelector('option[value=""]');
+      select.innerHTML = '';
+      if (blank) select.appendChild(blank);
+      if (keep) select.appendChild(keep);
+      results.forEach(function (item) {
+        if (String(item.id) === current) return;
+        var option = document.createElement('option');
+        option.value = item.id;
+        option.textContent = item.text;
+        select.appendChild(option);
+      });
+      select.value = current;
+    }
+
+    function load() {
+      var params = new URLSearchParams({q: search.value.trim()});
+      if (dependsOn && dependsOn.value) params.set(dependsOn.name, dependsOn.value);
+      fetch(select.dataset.autocomplete + '?' + params, {credentials: 'same-origin'})
+        .then(function (r) { return r.ok ? r.json() : {results: []}; })
+        .then(function (data) { loaded = true; fill(data.results); });
+    }
+
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, 200);
+    });
+    // the first time the list is opened, show the top matches for an empty query
+    select.addEventListener('focus', function () { if (!loaded) load(); });
+    if (dependsOn) {
+      dependsOn.addEventListener('change', function () {
+        select.value = '';
+        search.value = '';
+        load();
+      });
+    }
+  }
+
+  document.querySelectorAll('select[data-autocomplete]').forEach(setup);
+})();
@@ -0,0 +1,53 @@
+"""
+Job tasks that ship with the app (see core.jobs).
+
+Imported by CoreConfig.ready(), so every web and worker process, including
+--processes pool children, registers the same names. Arguments arrive as
+JSON, so dates are ISO strings.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import absences, archive, counters, fragments, rollups, search, thumbnails
+from .jobs import task
+
+
+@task('archive_attendance', max_attempts=1, timeout=3600)
+def archive_attendance(months=None):
+    if months is None:
+        months = getattr(settings, 'EMS_ATTENDANCE_RETENTION_MONTHS', 12)
+    cutoff = archive.cutoff_for(months, timezone.localdate())
+    return {'cutoff': cutoff, 'moved': archive.archive(cutoff)}
+
+
+@task('close_attendance_day', max_attempts=2)
+def close_attendance_day(day=None):
+    day = parse_date(day) if day else timezone.localdate() - timedelta(days=1)
+    return {str(d): n for d, n in absences.close(day).items()}
+
+
+@task('rollup_sessions', timeout=3600)
+def rollup_sessions(since=None):
+    return {'sessions': rollups.rebuild(parse_date(since) if since else None)}
+
+
+@task('rebuild_counters')
+def rebuild_counters():
+    keys = counters.rebuild()
+    fragments.bump('user', 'department', 'employeeprofile', 'attendance', 'leave')  # the dashboard shows them
+    return {'keys': keys}
+
+
+@task('reindex_search')
+def reindex_search():
+    with transaction.atomic():  # DELETE + INSERT: two runs must not interleave
+        search.reindex()
+
+
+@task('build_thumbnails')
+def build_thumbnails(profile_id, photo_name):
+    return thumbnails.build(profile_id, photo_name)
@@ -0,0 +1,32 @@
+from django import template
+from django.utils.html import format_html
+
+from core.thumbnails import best_variant
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_photo(profile, size=48, css_class='rounded'):
+    """<picture> with WebP and JPEG thumbnails, falling back to the original upload."""
+    if not profile or not profile.photo:
+        return ''
+    variant = best_variant(profile, size)
+    if variant is None:
+        return format_html(
+            '<img src="{}" class="{}" width="{}" height="{}" loading="lazy" alt="">',
+            profile.photo.url, css_class, size, size,
+        )
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">'
+        '<img src="{}" class="{}" width="{}" height="{}" loading="lazy" alt=""></picture>',
+        variant['webp'], variant['jpeg'], css_class, size, size,
+    )
+
+
+@register.filter
+def hours(seconds):
+    """Seconds as hours with one decimal ('' for no data)."""
+    if seconds is None:
+        return ''
+    return f'{seconds / 3600:.1f}'
@@ -0,0 +1,499 @@
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import absences, archive, counters, fragments, jobs, session_log
+from core.management.commands.bench_views import SERVER_TIMING_QUERIES
+from core.management.commands.profile_report import percentile
+from core.models import (
+    ArchivedAttendance, Attendance, Counter, Department, EmployeeProfile, Job, Leave, UserSession,
+)
+from core.pagination import keyset_paginate
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+# Transaction-, not TestCase: core.aio pool threads use their own connections
+# and must see the committed rows
+@override_settings(EMS_PROFILING=True, EMS_PROFILE_LOG=None, CACHES=LOCMEM)
+class ProfilingMiddlewareTests(TransactionTestCase):
+
+    def test_counts_queries_run_on_async_pool_threads(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as on_request_thread:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        counted = int(SERVER_TIMING_QUERIES.search(response['Server-Timing']).group(1))
+        self.assertGreater(counted, 0)
+        # the dashboard numbers are read through gather_queries, off this thread
+        self.assertGreater(counted, len(on_request_thread.captured_queries))
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 21))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99, 100)], [10, 19, 20, 20])
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile(values, 0), 1)
+
+
+@override_settings(CACHES=LOCMEM)
+class EmployeeDepartmentTests(TransactionTestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.sales = Department.objects.create(name='Sales')
+        self.employee = User.objects.create_user('alice', 'alice@example.com', 'password')
+        EmployeeProfile.objects.create(user=self.employee, department=self.sales)
+        Attendance.objects.create(employee=self.employee, date='2026-03-02', status='PRESENT')
+
+    def update(self, **profile):
+        return self.client.post(reverse('employee_update', args=[self.employee.pk]), {
+            'first_name': 'Alice', 'last_name': 'Smith', 'email': 'alice@example.com',
+            'position': '', 'phone': '', **profile,
+        })
+
+    def test_profile_save_without_department_change_keeps_fragments(self):
+        before = fragments.versions('attendance', 'leave')
+        stamped = Attendance.objects.get().updated_at
+        response = self.update(department=str(self.sales.pk), phone='555-0100')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(EmployeeProfile.objects.get(user=self.employee).phone, '555-0100')
+        self.assertEqual(fragments.versions('attendance', 'leave'), before)
+        self.assertEqual(Attendance.objects.get().updated_at, stamped)
+
+    def test_department_change_moves_rows(self):
+        support = Department.objects.create(name='Support')
+        before = fragments.versions('attendance', 'leave')
+        self.update(department=str(support.pk))
+        self.assertEqual(Attendance.objects.get().department_id, support.pk)
+        self.assertNotEqual(fragments.versions('attendance', 'leave'), before)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        employees = [User.objects.create_user(f'emp{i}') for i in range(3)]
+        start = date(2026, 3, 1)
+        # several rows per date, so pages split inside runs of equal sort keys
+        Attendance.objects.bulk_create([
+            Attendance(employee=e, date=start + timedelta(days=d), status='PRESENT')
+            for d in range(7) for e in employees
+        ])
+        cls.expected = list(Attendance.objects.order_by('-date', '-id').values_list('pk', flat=True))
+
+    def page(self, **params):
+        request = RequestFactory().get('/', {'page_size': 4, **params})
+        return keyset_paginate(request, Attendance.objects.all(), ['-date'])
+
+    def test_next_cursors_walk_every_row_once_in_order(self):
+        seen, page = [], self.page()
+        self.assertFalse(page.has_previous)
+        while True:
+            seen += [row.pk for row in page]
+            if not page.has_next:
+                break
+            page = self.page(cursor=page.next_cursor)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        first = self.page()
+        second = self.page(cursor=first.next_cursor)
+        back = self.page(cursor=second.prev_cursor)
+        self.assertEqual([r.pk for r in back], [r.pk for r in first])
+        self.assertTrue(back.has_next)
+
+    def test_malformed_cursor_falls_back_to_the_first_page(self):
+        page = self.page(cursor='not-a-cursor')
+        self.assertEqual([r.pk for r in page], self.expected[:4])
+
+    def test_page_query_keeps_other_parameters(self):
+        page = keyset_paginate(RequestFactory().get('/', {'page_size': 4, 'q': 'x'}),
+                               Attendance.objects.all(), ['-date'])
+        self.assertIn('q=x', page.next_query)
+        self.assertIn('cursor=', page.next_query)
+
+    def test_fallback_rows_merge_in_sort_order(self):
+        # archived rows keep their ids and sort after everything still hot
+        old = Attendance.objects.order_by('date', 'id')[:6]
+        ArchivedAttendance.objects.bulk_create([
+            ArchivedAttendance(id=row.id, employee_id=row.employee_id, date=row.date - timedelta(days=30),
+                               status=row.status, updated_at=timezone.now())
+            for row in old
+        ])
+        hot = Attendance.objects.exclude(pk__in=[r.pk for r in old])
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 4, **({'cursor': cursor} if cursor else {})}
+            page = keyset_paginate(RequestFactory().get('/', params), hot, ['-date'],
+                                   fallback=ArchivedAttendance.objects.all())
+            seen += [(row.date, row.pk) for row in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), len(self.expected))
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.sales = Department.objects.create(name='Sales')
+        self.alice = User.objects.create_user('alice')
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployeeProfile.objects.create(user=self.alice, department=self.sales)
+
+    def test_writes_recount_on_commit(self):
+        key = counters.key('user', 'attendance', self.alice.pk)
+        before = counters.read(key)[key]
+        with self.captureOnCommitCallbacks(execute=True):
+            row = Attendance.objects.create(employee=self.alice, date='2026-03-02', status='PRESENT')
+            Attendance.objects.create(employee=self.alice, date='2026-03-03', status='PRESENT')
+            # nothing is recounted until the transaction commits
+            self.assertEqual(counters.read(key)[key], before)
+        self.assertEqual(counters.read(key)[key], before + 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        self.assertEqual(counters.read(key)[key], before + 1)
+
+    def test_leave_decision_moves_pending_counts(self):
+        user_key = counters.key('user', 'leaves_pending', self.alice.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            leave = Leave.objects.create(employee=self.alice, start_date='2026-03-02',
+                                         end_date='2026-03-03', reason='x')
+        self.assertEqual(counters.read('leaves_pending', user_key), {'leaves_pending': 1, user_key: 1})
+        leave.status = 'APPROVED'
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.save()
+        self.assertEqual(counters.read('leaves_pending', user_key), {'leaves_pending': 0, user_key: 0})
+
+    def test_department_change_recounts_both_departments(self):
+        support = Department.objects.create(name='Support')
+        profile = self.alice.profile
+        profile.department = support
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        keys = [counters.key('dept', 'employees', d.pk) for d in (self.sales, support)]
+        self.assertEqual(list(counters.read(*keys).values()), [0, 1])
+
+    def test_rebuild_matches_maintained_values(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.alice, date='2026-03-02', status='PRESENT')
+            Leave.objects.create(employee=self.alice, start_date='2026-03-02', end_date='2026-03-02', reason='x')
+        maintained = dict(Counter.objects.values_list('key', 'value'))
+        counters.rebuild()
+        rebuilt = dict(Counter.objects.values_list('key', 'value'))
+        self.assertEqual({k: v for k, v in maintained.items() if v}, {k: v for k, v in rebuilt.items() if v})
+
+
+
+class ImportEmployeesTests(TestCase):
+
+    def test_jsonl_lines_that_are_not_objects_are_reported(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as fh:
+            fh.write('{"username": "alice"}\n{"username": \n[1, 2]\n\n{"username": "bob"}\n')
+        self.addCleanup(os.remove, fh.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_employees', fh.name, '--dry-run', stdout=out, stderr=err)
+        self.assertIn('Validated 2 employees, 2 errors', out.getvalue())
+        self.assertEqual(err.getvalue().splitlines(), ['line 2: not a JSON object', 'line 3: not a JSON object'])
+
+
+
+@override_settings(CACHES=LOCMEM)
+class ApiScopeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = Department.objects.create(name='Sales')
+        support = Department.objects.create(name='Support')
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.manager = cls.member('manager', 'MANAGER', cls.sales)
+        cls.alice = cls.member('alice', 'EMPLOYEE', cls.sales)
+        cls.bob = cls.member('bob', 'EMPLOYEE', support)
+        for user in (cls.alice, cls.bob):
+            Attendance.objects.create(employee=user, date='2026-03-02', status='PRESENT')
+
+    @classmethod
+    def member(cls, username, group, department=None):
+        user = User.objects.create_user(username)
+        user.groups.add(Group.objects.get_or_create(name=group)[0])
+        EmployeeProfile.objects.create(user=user, department=department)
+        return user
+
+    def setUp(self):
+        cache.clear()
+
+    def employees(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse('api_list', args=['attendance']), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['employee'] for row in response.json()['results'])
+
+    def bulk(self, user, records):
+        self.client.force_login(user)
+        return self.client.post(reverse('api_attendance_bulk'), json.dumps({'records': records}),
+                                content_type='application/json')
+
+    def test_rows_are_scoped_by_role(self):
+        self.assertEqual(self.employees(self.admin), [self.alice.pk, self.bob.pk])
+        self.assertEqual(self.employees(self.manager), [self.alice.pk])
+        self.assertEqual(self.employees(self.bob), [self.bob.pk])
+        self.assertEqual(self.employees(self.admin, mine='1'), [])
+
+    def test_manager_without_department_sees_nothing(self):
+        self.manager.profile.department = None
+        self.manager.profile.save()
+        self.assertEqual(self.employees(self.manager), [])
+
+    def test_fields_select_the_returned_keys(self):
+        self.client.force_login(self.admin)
+        url = reverse('api_list', args=['attendance'])
+        rows = self.client.get(url, {'fields': 'username,status'}).json()['results']
+        self.assertEqual({tuple(row) for row in rows}, {('username', 'status')})
+        self.assertEqual(self.client.get(url, {'fields': 'password'}).status_code, 400)
+
+    def test_impossible_dates_are_a_json_400(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('api_list', args=['attendance']), {'start': '2026-02-30'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start', response.json()['error'])
+
+    def test_bulk_rejects_employees_outside_the_managers_department(self):
+        response = self.bulk(self.manager, [
+            {'employee': self.alice.pk, 'date': '2026-03-03'},
+            {'employee': self.bob.pk, 'date': '2026-03-03'},
+        ])
+        self.assertEqual(response.json(), {'saved': 1, 'rejected': [1]})
+        self.assertFalse(Attendance.objects.filter(employee=self.bob, date='2026-03-03').exists())
+
+    def test_bulk_refuses_managers_without_department(self):
+        self.manager.profile.department = None
+        self.manager.profile.save()
+        response = self.bulk(self.manager, [{'employee': self.bob.pk, 'date': '2026-03-03'}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attendance.objects.filter(date='2026-03-03').exists())
+
+    def test_bulk_rejects_archived_days(self):
+        ArchivedAttendance.objects.create(employee=self.bob, date='2026-01-30', status='PRESENT',
+                                          updated_at=timezone.now())
+        response = self.bulk(self.admin, [
+            {'employee': self.alice.pk, 'date': '2026-01-29'},
+            {'employee': self.alice.pk, 'date': '2026-01-31'},
+        ])
+        self.assertEqual(response.json(), {'saved': 1, 'rejected': [0]})
+
+
+@override_settings(CACHES=LOCMEM)
+class DateParameterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_roster_falls_back_to_today_for_impossible_date(self):
+        response = self.client.get(reverse('attendance_roster'), {'date': '2026-02-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['day'], timezone.localdate())
+
+    def test_export_rejects_impossible_dates(self):
+        url = reverse('export_csv', args=['attendance'])
+        response = self.client.get(url, {'start': '2026-02-30'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2026-02-28'}).status_code, 200)
+
+    def test_report_falls_back_to_this_month_for_impossible_month(self):
+        response = self.client.get(reverse('attendance_report'), {'month': '2026-13'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['month'], timezone.localdate().replace(day=1))
+
+    def test_bulk_decision_with_impossible_window_changes_nothing(self):
+        leave = Leave.objects.create(employee=self.admin, start_date='2026-03-02', end_date='2026-03-03', reason='x')
+        response = self.client.post(reverse('leave_bulk_decide'), {
+            'action': 'APPROVED', 'all_pending': '1', 'start': '2026-02-30',
+        })
+        self.assertRedirects(response, reverse('leave_list'), fetch_redirect_response=False)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'PENDING')
+
+    def test_hours_report_falls_back_to_default_weeks_for_impossible_dates(self):
+        response = self.client.get(reverse('session_report'), {'start': '2026-02-30', 'end': '2026-13-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['weeks']), 5)
+
+
+
+class ArchiveTests(TestCase):
+
+    def test_replacing_an_archived_row_recounts_the_employee(self):
+        alice = User.objects.create_user('alice')
+        ArchivedAttendance.objects.create(employee=alice, date='2026-01-05', status='ABSENT',
+                                          updated_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=alice, date='2026-01-05', status='PRESENT')
+            Attendance.objects.create(employee=alice, date='2026-01-06', status='PRESENT')
+        key = counters.key('user', 'attendance', alice.pk)
+        self.assertEqual(counters.read(key)[key], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive(date(2026, 2, 1)), 2)
+        self.assertEqual(counters.read(key)[key], 2)
+        self.assertEqual(ArchivedAttendance.objects.get(date='2026-01-05').status, 'PRESENT')
+
+
+class SessionLogTests(TestCase):
+
+    def test_every_buffered_logout_closes_a_session(self):
+        alice = User.objects.create_user('alice')
+        start = timezone.now() - timedelta(hours=3)
+        UserSession.objects.bulk_create([
+            UserSession(user=alice, login_time=start),
+            UserSession(user=alice, login_time=start + timedelta(hours=1)),
+        ])
+        session_log._write([
+            (session_log.LOGOUT, alice.pk, start + timedelta(hours=2), 0),
+            (session_log.LOGOUT, alice.pk, start + timedelta(hours=2, minutes=5), 0),
+        ])
+        self.assertEqual(
+            list(UserSession.objects.order_by('login_time').values_list('logout_time', flat=True)),
+            [start + timedelta(hours=2, minutes=5), start + timedelta(hours=2)],
+        )
+
+
+@jobs.task('tests.noop', max_attempts=2, timeout=60)
+def noop():
+    return 'done'
+
+
+class StubRun:
+    killable = False
+
+    def __init__(self, ok, value):
+        self.value = (ok, value)
+        self.finished = False
+
+    def done(self):
+        return self.finished
+
+    def outcome(self):
+        return self.value
+
+
+@override_settings(EMS_JOB_RETRY_DELAY=10, EMS_JOB_STALE_SECONDS=300)
+class JobTests(TestCase):
+
+    def claim_one(self, worker='w1'):
+        claimed = jobs.claim(worker, 1)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_failures_back_off_until_attempts_run_out(self):
+        jobs.enqueue(noop)
+        job = self.claim_one()
+        jobs.fail(job, 'boom')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), ('PENDING', 1, ''))
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=2)
+        self.assertEqual(jobs.claim('w1', 1), [])  # not due yet
+
+        Job.objects.update(run_at=timezone.now())
+        job = self.claim_one()
+        jobs.fail(job, 'boom again')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('FAILED', 2, 'boom again'))
+
+    def test_only_jobs_without_heartbeat_are_requeued(self):
+        jobs.enqueue(noop)
+        jobs.enqueue(noop)
+        alive, dead = jobs.claim('w1', 2)
+        later = timezone.now() + timedelta(seconds=400)
+        worker = jobs.Worker()
+        worker.name = 'w1'
+        worker.running = {object(): (alive, later)}
+        worker.heartbeat(later - timedelta(seconds=60))
+
+        self.assertEqual(jobs.requeue_stale(later), 1)
+        self.assertEqual(Job.objects.get(pk=alive.pk).status, 'RUNNING')
+        dead = Job.objects.get(pk=dead.pk)
+        self.assertEqual((dead.status, dead.worker), ('PENDING', ''))
+
+    def test_overdue_thread_run_is_not_retried_while_it_runs(self):
+        jobs.enqueue(noop)
+        job = self.claim_one()
+        worker = jobs.Worker()
+        worker.name = 'w1'
+        run = StubRun(True, 'done')
+        worker.running = {run: (job, timezone.now() - timedelta(seconds=1))}
+
+        worker.reap()
+        self.assertIn(run, worker.overdue)
+        self.assertEqual(Job.objects.get().status, 'RUNNING')
+
+        run.finished = True
+        worker.reap()
+        self.assertEqual(worker.running, {})
+        self.assertEqual(Job.objects.values_list('status', 'result').get(), ('DONE', 'done'))
+
+
+@override_settings(CACHES=LOCMEM, EMS_WORKING_DAYS=(0, 1, 2, 3, 4))
+class AbsenceTests(TestCase):
+    monday, tuesday = date(2026, 3, 2), date(2026, 3, 3)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = Department.objects.create(name='Sales')
+        joined = timezone.now() - timedelta(days=365)
+        cls.alice, cls.bob, cls.carol = (
+            User.objects.create_user(name, date_joined=joined) for name in ('alice', 'bob', 'carol')
+        )
+        for user in (cls.alice, cls.bob, cls.carol):
+            EmployeeProfile.objects.create(user=user, department=cls.sales)
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')  # staff: never expected
+        User.objects.create_user('dave', date_joined=timezone.now() + timedelta(days=1))  # no profile
+        Attendance.objects.create(employee=cls.alice, date=cls.monday, status='PRESENT')
+        Leave.objects.create(employee=cls.bob, start_date=cls.monday, end_date=cls.tuesday,
+                             reason='x', status='APPROVED')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_skips_marked_and_approved_leave(self):
+        found = absences.missing(self.monday, self.monday + timedelta(days=6))
+        self.assertEqual(sorted(found), [self.monday + timedelta(days=i) for i in range(5)])
+        self.assertEqual(found[self.monday], {self.carol.pk: self.sales.pk})
+        self.assertEqual(set(found[self.tuesday]), {self.alice.pk, self.carol.pk})
+
+    def test_close_inserts_absent_rows_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(absences.close(self.monday, self.tuesday), {self.monday: 1, self.tuesday: 2})
+        absent = Attendance.objects.filter(status='ABSENT')
+        self.assertEqual(absent.count(), 3)
+        self.assertEqual(set(absent.values_list('department_id', flat=True)), {self.sales.pk})
+        key = counters.key('user', 'attendance', self.carol.pk)
+        self.assertEqual(counters.read(key)[key], 2)
+        self.assertEqual(absences.close(self.monday, self.tuesday), {self.monday: 0, self.tuesday: 0})
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(absences.close(self.monday, dry_run=True), {self.monday: 1})
+        self.assertFalse(Attendance.objects.filter(status='ABSENT').exists())
+
+    def test_archived_days_are_refused(self):
+        ArchivedAttendance.objects.create(employee=self.carol, date=self.monday, status='PRESENT',
+                                          updated_at=timezone.now())
+        with self.assertRaises(ValueError):
+            absences.close(self.monday)
@@ -0,0 +1,112 @@
+"""
+Resized WebP/JPEG variants of EmployeeProfile.photo.
+
+Variants are written next to the upload under profiles/thumbs/ and recorded
+in EmployeeProfile.photo_thumbs as
+    {'src': <photo name>, '48': {'webp': <name>, 'jpeg': <name>}, ...}
+Generation runs as a build_thumbnails job (core.jobs), so uploads never wait
+on Pillow and queued work survives restarts. The variants of a replaced or
+removed photo are deleted.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import fragments, jobs
+from .models import EmployeeProfile
+
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+
+def sizes():
+    return tuple(getattr(settings, 'EMS_THUMBNAIL_SIZES', (48, 128)))
+
+
+def _variant_name(photo_name, size, ext):
+    stem = os.path.splitext(os.path.basename(photo_name))[0]
+    return f'profiles/thumbs/{stem}_{size}.{ext}'
+
+
+def render_variants(photo_name):
+    """Write every size/format for one photo and return the photo_thumbs mapping."""
+    from PIL import Image, ImageOps
+
+    with default_storage.open(photo_name, 'rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    thumbs = {'src': photo_name}
+    for size in sizes():
+        # square crop: the templates always show photos as squares
+        resized = ImageOps.fit(image, (size * 2, size * 2), Image.LANCZOS)  # 2x for HiDPI
+        thumbs[str(size)] = {}
+        for ext, fmt, options in FORMATS:
+            buf = io.BytesIO()
+            resized.save(buf, fmt, **options)
+            name = _variant_name(photo_name, size, ext)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            thumbs[str(size)][ext] = default_storage.save(name, ContentFile(buf.getvalue()))
+    return thumbs
+
+
+def _names(thumbs):
+    return {name for key, variants in (thumbs or {}).items() if key.isdigit() for name in variants.values()}
+
+
+def discard(thumbs, keep=None):
+    """Delete the variant files of a photo_thumbs mapping, except those also in `keep`."""
+    for name in _names(thumbs) - _names(keep):
+        default_storage.delete(name)
+
+
+def build(profile_id, photo_name):
+    """Generate thumbnails and store them unless the photo changed meanwhile."""
+    thumbs = render_variants(photo_name)
+    with transaction.atomic():
+        current = EmployeeProfile.objects.filter(pk=profile_id).values('photo', 'photo_thumbs').first()
+        if current and current['photo'] == photo_name:
+            EmployeeProfile.objects.filter(pk=profile_id).update(photo_thumbs=thumbs)
+            fragments.bump('employeeprofile')
+            stale, keep = current['photo_thumbs'], thumbs
+        else:
+            # replaced or removed while rendering: these variants are already orphans
+            stale, keep = thumbs, current and current['photo_thumbs']
+    discard(stale, keep)
+    return thumbs
+
+
+def schedule(profile):
+    """Queue thumbnail generation for a new photo, or drop the variants of a removed one."""
+    thumbs = profile.photo_thumbs or {}
+    if not profile.photo:
+        if thumbs:
+            EmployeeProfile.objects.filter(pk=profile.pk).update(photo_thumbs={})
+            profile.photo_thumbs = {}
+            transaction.on_commit(lambda: discard(thumbs))
+        return
+    if thumbs.get('src') != profile.photo.name:
+        # the old variants go once the job has stored the new ones
+        jobs.enqueue('build_thumbnails', profile.pk, profile.photo.name)
+
+
+def best_variant(profile, size):
+    """
+    Smallest generated size that still covers `size`, as {'webp': url, 'jpeg': url},
+    or None when no thumbnails exist yet.
+    """
+    thumbs = profile.photo_thumbs or {}
+    if not profile.photo or thumbs.get('src') != profile.photo.name:
+        return None
+    available = sorted(int(k) for k in thumbs if k.isdigit())
+    if not available:
+        return None
+    chosen = next((s for s in available if s >= size), available[-1])
+    return {ext: default_storage.url(name) for ext, name in thumbs[str(chosen)].items()}
@@ -25,6 +25,7 @@ urlpatterns = [
     # Attendance
     path('attendance/', views.attendance_list, name='attendance_list'),
     path('attendance/add/', views.attendance_create, name='attendance_create'),
+    path('attendance/roster/', views.attendance_roster, name='attendance_roster'),
     path('my-attendance/', views.my_attendance, name='my_attendance'),
 
     # Leaves
@@ -33,8 +34,23 @@ urlpatterns = [
     path('my-leaves/', views.my_leaves, name='my_leaves'),
     path('leaves/<int:pk>/approve/', views.leave_approve, name='leave_approve'),
     path('leaves/<int:pk>/reject/', views.leave_reject, name='leave_reject'),
+    path('leaves/decide/', views.leave_bulk_decide, name='leave_bulk_decide'),
     
     #sessions
     path('sessions/', views.session_list, name='session_list'),
 
+    # Reports
+    path('reports/attendance/', views.attendance_report, name='attendance_report'),
+    path('reports/hours/', views.session_report, name='session_report'),
+
+    # Exports
+    path('exports/<str:kind>.csv', views.export_csv, name='export_csv'),
+
+    # JSON API
+    path('api/attendance/bulk/', views.api_attendance_bulk, name='api_attendance_bulk'),
+    path('api/leaves/apply/', views.api_leave_apply, name='api_leave_apply'),
+    path('api/leaves/decide/', views.api_leave_decide, name='api_leave_decide'),
+    path('api/autocomplete/<str:kind>/', views.autocomplete, name='autocomplete'),
+    path('api/<str:resource>/', views.api_list, name='api_list'),
+
 ]
@@ -1,45 +1,87 @@
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django.db.models import Q, Count
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-
-from .decorators import group_required
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_POST
+
+from . import archive, autocomplete as autocomplete_sources, counters, dates, rollups, search
+from .api import RESOURCES, ApiError, api_endpoint, attendance_records, json_response, list_page, read_json
+from .aio import gather_queries
+from .conditional import conditional_list
+from .decorators import async_login_required, group_required, write_transaction
+from .exports import EXPORTS, csv_lines, export_rows
+from .fragments import bump as bump_fragments, fragment_key
+from .roles import get_roles, prime_roles, roles_for_user
 from .forms import (
     DepartmentForm, PositionForm,
     EmployeeCreateForm, EmployeeUpdateForm,
-    AttendanceForm, LeaveForm
+    AttendanceForm, LeaveForm, RosterFormSet
 )
-from .models import Department, Position, EmployeeProfile, Attendance, Leave
+from .models import Department, Position, EmployeeProfile, Attendance, ArchivedAttendance, Leave
+from .leaves import attach_coverage, decide as decide_leaves
+from .pagination import keyset_paginate
+from .reports import aattendance_matrix
 
 from django.contrib.auth import login
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.views import LoginView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+
+# Models whose writes change a cached page fragment (see core.fragments)
+DASHBOARD_DEPENDS = ('user', 'department', 'employeeprofile', 'attendance', 'leave')
+EMPLOYEE_LIST_DEPENDS = ('user', 'employeeprofile', 'department', 'position')
+
+def _dashboard_counts(uid, dept_id):
+    keys = {
+        'total_employees': counters.key('global', 'employees'),
+        'total_departments': counters.key('global', 'departments'),
+        'pending_leaves': counters.key('global', 'leaves_pending'),
+        'my_attendance_count': counters.key('user', 'attendance', uid),
+        'my_pending_leaves': counters.key('user', 'leaves_pending', uid),
+    }
+    if dept_id:
+        keys['dept_employees'] = counters.key('dept', 'employees', dept_id)
+    values = counters.read(*keys.values())
+    stats = {name: values[k] for name, k in keys.items()}
+    stats.setdefault('dept_employees', 0)
+    return stats
+
+@async_login_required
+async def dashboard(request):
+    # Simple role-aware dashboard, numbers come precomputed from core.counters
+    roles = await sync_to_async(get_roles)(request)
+    key = await sync_to_async(fragment_key)(request, *DASHBOARD_DEPENDS, per_user=True)
+    uid, dept_id = request.user.pk, roles.department_id
+
+    def my_dept():
+        # If manager, show their department stats
+        return Department.objects.filter(pk=dept_id).first() if dept_id else None
+
+    if await cache.aget(make_template_fragment_key('dashboard', [key])) is None:
+        counts, dept = await gather_queries(partial(_dashboard_counts, uid, dept_id), my_dept)
+        stats = {**counts, 'my_dept': dept}
+    else:
+        # normally never evaluated; covers the fragment expiring before render
+        stats = SimpleLazyObject(lambda: {**_dashboard_counts(uid, dept_id), 'my_dept': my_dept()})
 
-@login_required
-def dashboard(request):
-    # Simple role-aware dashboard
-    total_employees = User.objects.filter(is_staff=False).count()
-    total_departments = Department.objects.count()
-    pending_leaves = Leave.objects.filter(status='PENDING').count()
-
-    my_attendance_count = Attendance.objects.filter(employee=request.user).count()
-    my_pending_leaves = Leave.objects.filter(employee=request.user, status='PENDING').count()
-
-    # If manager, show their department stats
-    my_dept = getattr(getattr(request.user, 'profile', None), 'department', None)
-    dept_employees = User.objects.filter(profile__department=my_dept).count() if my_dept else 0
-
-    return render(request, 'dashboard.html', {
-        'total_employees': total_employees,
-        'total_departments': total_departments,
-        'pending_leaves': pending_leaves,
-        'my_attendance_count': my_attendance_count,
-        'my_pending_leaves': my_pending_leaves,
-        'dept_employees': dept_employees,
-        'my_dept': my_dept,
+    return await sync_to_async(render)(request, 'dashboard.html', {
+        'stats': stats,
+        'fragment_key': key,
+        'fragment_timeout': settings.EMS_FRAGMENT_CACHE_TIMEOUT,
     })
 
 # --- Departments ---
@@ -47,10 +89,15 @@ def dashboard(request):
 @group_required('ADMIN')
 def department_list(request):
     items = Department.objects.all()
-    return render(request, 'department_list.html', {'items': items})
+    return render(request, 'department_list.html', {
+        'items': items,
+        'fragment_key': fragment_key(request, 'department'),
+        'fragment_timeout': settings.EMS_FRAGMENT_CACHE_TIMEOUT,
+    })
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def department_create(request):
     form = DepartmentForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
@@ -61,6 +108,7 @@ def department_create(request):
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def department_update(request, pk):
     obj = get_object_or_404(Department, pk=pk)
     form = DepartmentForm(request.POST or None, instance=obj)
@@ -72,6 +120,7 @@ def department_update(request, pk):
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def department_delete(request, pk):
     obj = get_object_or_404(Department, pk=pk)
     if request.method == 'POST':
@@ -85,10 +134,15 @@ def department_delete(request, pk):
 @group_required('ADMIN')
 def position_list(request):
     items = Position.objects.select_related('department').all()
-    return render(request, 'position_list.html', {'items': items})
+    return render(request, 'position_list.html', {
+        'items': items,
+        'fragment_key': fragment_key(request, 'position', 'department'),
+        'fragment_timeout': settings.EMS_FRAGMENT_CACHE_TIMEOUT,
+    })
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def position_create(request):
     form = PositionForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
@@ -99,6 +153,7 @@ def position_create(request):
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def position_update(request, pk):
     obj = get_object_or_404(Position, pk=pk)
     form = PositionForm(request.POST or None, instance=obj)
@@ -110,6 +165,7 @@ def position_update(request, pk):
 
 @login_required
 @group_required('ADMIN')
+@write_transaction
 def position_delete(request, pk):
     obj = get_object_or_404(Position, pk=pk)
     if request.method == 'POST':
@@ -124,23 +180,27 @@ def position_delete(request, pk):
 def employee_list(request):
     q = request.GET.get('q', '').strip()
     users = User.objects.filter(is_superuser=False)
+    ordering = ['first_name', 'last_name', 'username']
     if q:
-        users = users.filter(
-            Q(username__icontains=q) |
-            Q(first_name__icontains=q) |
-            Q(last_name__icontains=q) |
-            Q(email__icontains=q)
-        )
+        users, ordering = search.search_users(users, q)
     # If manager, limit to their department
-    if not request.user.is_superuser and request.user.groups.filter(name='MANAGER').exists():
-        my_dept = getattr(getattr(request.user, 'profile', None), 'department', None)
-        if my_dept:
-            users = users.filter(profile__department=my_dept)
-    users = users.select_related('profile').order_by('first_name', 'last_name', 'username')
-    return render(request, 'employee_list.html', {'users': users, 'q': q})
+    scope_dept_id = get_roles(request).scope_department_id
+    if scope_dept_id:
+        users = users.filter(profile__department_id=scope_dept_id)
+    users = users.select_related('profile__department', 'profile__position__department')
+    # evaluated only when the table fragment is not cached
+    page = SimpleLazyObject(lambda: keyset_paginate(request, users, ordering))
+    return render(request, 'employee_list.html', {
+        'users': page,
+        'page': page,
+        'q': q,
+        'fragment_key': fragment_key(request, *EMPLOYEE_LIST_DEPENDS),
+        'fragment_timeout': settings.EMS_FRAGMENT_CACHE_TIMEOUT,
+    })
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@write_transaction
 def employee_create(request):
     form = EmployeeCreateForm(request.POST or None, request.FILES or None)
     if request.method == 'POST' and form.is_valid():
@@ -154,6 +214,7 @@ def employee_create(request):
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@write_transaction
 def employee_update(request, user_id):
     user = get_object_or_404(User, pk=user_id)
     profile = getattr(user, 'profile', None)
@@ -163,11 +224,12 @@ def employee_update(request, user_id):
         form = EmployeeUpdateForm(request.POST, request.FILES, instance=user)
         if form.is_valid():
             form.save()
-            profile.department_id = request.POST.get('department') or None
-            profile.position_id = request.POST.get('position') or None
-            profile.phone = request.POST.get('phone', '')
-            if request.FILES.get('photo'):
-                profile.photo = request.FILES['photo']
+            # cleaned values, not raw POST strings: signals compare the ids with the stored ones
+            profile.department = form.cleaned_data['department']
+            profile.position = form.cleaned_data['position']
+            profile.phone = form.cleaned_data['phone']
+            if form.cleaned_data['photo']:
+                profile.photo = form.cleaned_data['photo']
             profile.save()
             messages.success(request, 'Employee updated.')
             return redirect('employee_list')
@@ -182,13 +244,12 @@ def employee_update(request, user_id):
     'form': form,
     'user_obj': user,
     'profile': profile,
-    'departments': Department.objects.all(),
-    'positions': Position.objects.all(),
     'title': 'Edit Employee'
 })
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@write_transaction
 def employee_delete(request, user_id):
     user = get_object_or_404(User, pk=user_id)
     if request.method == 'POST':
@@ -198,22 +259,32 @@ def employee_delete(request, user_id):
     return render(request, 'confirm_delete.html', {'object': user, 'title': 'Delete Employee'})
 
 # --- Attendance ---
+def _attendance_scope(request, model=Attendance):
+    qs = model.objects.all()
+    q = request.GET.get('q', '').strip()
+    if q:
+        qs = qs.filter(search.user_filter(q, prefix='employee__'))
+    # Manager sees only their department
+    scope_dept_id = get_roles(request).scope_department_id
+    if scope_dept_id:
+        qs = qs.filter(department_id=scope_dept_id)
+    return qs
+
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@conditional_list(_attendance_scope)
 def attendance_list(request):
     q = request.GET.get('q', '').strip()
-    qs = Attendance.objects.select_related('employee', 'employee__profile').all()
-    if q:
-        qs = qs.filter(Q(employee__username__icontains=q) | Q(employee__first_name__icontains=q) | Q(employee__last_name__icontains=q))
-    # Manager sees only their department
-    if not request.user.is_superuser and request.user.groups.filter(name='MANAGER').exists():
-        my_dept = getattr(getattr(request.user, 'profile', None), 'department', None)
-        if my_dept:
-            qs = qs.filter(employee__profile__department=my_dept)
-    return render(request, 'attendance_list.html', {'items': qs, 'q': q})
+    qs = _attendance_scope(request).select_related('employee', 'created_by')
+    archived = None
+    if archive.covers(None):
+        archived = _attendance_scope(request, ArchivedAttendance).select_related('employee', 'created_by')
+    page = keyset_paginate(request, qs, ['-date'], fallback=archived)
+    return render(request, 'attendance_list.html', {'items': page, 'page': page, 'q': q})
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@write_transaction
 def attendance_create(request):
     form = AttendanceForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
@@ -225,14 +296,93 @@ def attendance_create(request):
     return render(request, 'attendance_form.html', {'form': form})
 
 @login_required
+@group_required('ADMIN', 'MANAGER')
+@write_transaction
+def attendance_roster(request):
+    data = request.POST if request.method == 'POST' else request.GET
+    day = dates.param(data, 'date', timezone.localdate())
+    roles = get_roles(request)
+    if roles.is_manager:
+        dept_id = roles.scope_department_id
+    else:
+        dept_id = data.get('department')
+        dept_id = int(dept_id) if dept_id and dept_id.isdigit() else None
+
+    employees = []
+    if dept_id:
+        employees = list(
+            User.objects.filter(profile__department_id=dept_id, is_active=True)
+            .only('id', 'username', 'first_name', 'last_name')
+            .order_by('first_name', 'last_name', 'username')
+        )
+
+    # Today's marks win; otherwise carry yesterday's status forward
+    prev_day = day - timedelta(days=1)
+    marks = {}
+    for emp_id, date, status, remarks in (
+        Attendance.objects.filter(employee__in=[e.pk for e in employees], date__in=[day, prev_day])
+        .values_list('employee_id', 'date', 'status', 'remarks')
+    ):
+        if date == day:
+            marks[emp_id] = {'status': status, 'remarks': remarks}
+        else:
+            marks.setdefault(emp_id, {'status': status, 'remarks': ''})
+    initial = [
+        {'employee': e.pk, **marks.get(e.pk, {'status': 'PRESENT', 'remarks': ''})}
+        for e in employees
+    ]
+
+    if request.method == 'POST':
+        formset = RosterFormSet(request.POST, initial=initial)
+        if formset.is_valid():
+            allowed = {e.pk for e in employees}
+            rows = [
+                Attendance(
+                    employee_id=f.cleaned_data['employee'], date=day,
+                    status=f.cleaned_data['status'], remarks=f.cleaned_data['remarks'],
+                    created_by=request.user, department_id=dept_id,
+                )
+                for f in formset if f.cleaned_data.get('employee') in allowed
+            ]
+            with transaction.atomic():
+                Attendance.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=['employee', 'date'],
+                    update_fields=['status', 'remarks', 'created_by', 'updated_at', 'department'],
+                )
+                counters.touch('user', 'attendance', *(r.employee_id for r in rows))
+                bump_fragments('attendance')
+            messages.success(request, f'Attendance saved for {len(rows)} employees.')
+            query = f'date={day.isoformat()}' + (f'&department={dept_id}' if not roles.is_manager else '')
+            return redirect(f"{reverse('attendance_roster')}?{query}")
+    else:
+        formset = RosterFormSet(initial=initial)
+
+    return render(request, 'attendance_roster.html', {
+        'formset': formset,
+        'rows': list(zip(formset.forms, employees)),
+        'day': day,
+        'dept_id': dept_id,
+        'departments': None if roles.is_manager else Department.objects.all(),
+    })
+
+def _my_attendance_scope(request, model=Attendance):
+    return model.objects.filter(employee=request.user)
+
+@login_required
+@conditional_list(_my_attendance_scope)
 def my_attendance(request):
-    items = Attendance.objects.filter(employee=request.user).order_by('-date')
-    return render(request, 'attendance_list.html', {'items': items, 'my_view': True})
+    items = _my_attendance_scope(request).select_related('employee', 'created_by')
+    archived = None
+    if archive.covers(None):
+        archived = _my_attendance_scope(request, ArchivedAttendance).select_related('employee', 'created_by')
+    page = keyset_paginate(request, items, ['-date'], fallback=archived)
+    return render(request, 'attendance_list.html', {'items': page, 'page': page, 'my_view': True})
 
 # --- Leaves ---
 @login_required
+@write_transaction
 def leave_apply(request):
-    form = LeaveForm(request.POST or None)
+    form = LeaveForm(request.POST or None, employee=request.user)
     if request.method == 'POST' and form.is_valid():
         leave = form.save(commit=False)
         leave.employee = request.user
@@ -241,42 +391,96 @@ def leave_apply(request):
         return redirect('my_leaves')
     return render(request, 'leave_form.html', {'form': form})
 
+def _my_leaves_scope(request):
+    return Leave.objects.filter(employee=request.user)
+
 @login_required
+@conditional_list(_my_leaves_scope)
 def my_leaves(request):
-    items = Leave.objects.filter(employee=request.user).order_by('-applied_at')
-    return render(request, 'leave_list.html', {'items': items, 'my_view': True})
+    items = _my_leaves_scope(request)
+    page = keyset_paginate(request, items, ['-applied_at'])
+    return render(request, 'leave_list.html', {'items': page, 'page': page, 'my_view': True})
+
+def _leave_scope(request):
+    # Managers see their dept; admins see all
+    qs = Leave.objects.all()
+    scope_dept_id = get_roles(request).scope_department_id
+    if scope_dept_id:
+        qs = qs.filter(department_id=scope_dept_id)
+    return qs
+
+def _decision_department(request):
+    # decide_leaves() reads None as "every department"; a manager without one decides nothing
+    roles = get_roles(request)
+    if roles.is_manager and not roles.scope_department_id:
+        raise PermissionDenied
+    return roles.scope_department_id
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
+@conditional_list(_leave_scope)
 def leave_list(request):
-    # Managers see their dept; admins see all
-    qs = Leave.objects.select_related('employee', 'employee__profile').all()
-    if not request.user.is_superuser and request.user.groups.filter(name='MANAGER').exists():
-        my_dept = getattr(getattr(request.user, 'profile', None), 'department', None)
-        if my_dept:
-            qs = qs.filter(employee__profile__department=my_dept)
-    return render(request, 'leave_list.html', {'items': qs})
+    qs = _leave_scope(request).select_related('employee')
+    page = keyset_paginate(request, qs, ['-applied_at'])
+    attach_coverage([l for l in page if l.status == 'PENDING'])
+    return render(request, 'leave_list.html', {'items': page, 'page': page})
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
 def leave_approve(request, pk):
-    obj = get_object_or_404(Leave, pk=pk)
-    obj.status = 'APPROVED'
-    obj.decided_by = request.user
-    obj.decided_at = timezone.now()
-    obj.save()
-    messages.success(request, 'Leave approved.')
+    changed = decide_leaves(Leave.objects.filter(pk=pk), 'APPROVED', request.user,
+                            _decision_department(request))
+    if changed:
+        messages.success(request, 'Leave approved.')
+    else:
+        messages.warning(request, 'Leave was already decided or is outside your department.')
     return redirect('leave_list')
 
 @login_required
 @group_required('ADMIN', 'MANAGER')
 def leave_reject(request, pk):
-    obj = get_object_or_404(Leave, pk=pk)
-    obj.status = 'REJECTED'
-    obj.decided_by = request.user
-    obj.decided_at = timezone.now()
-    obj.save()
-    messages.success(request, 'Leave rejected.')
+    changed = decide_leaves(Leave.objects.filter(pk=pk), 'REJECTED', request.user,
+                            _decision_department(request))
+    if changed:
+        messages.success(request, 'Leave rejected.')
+    else:
+        messages.warning(request, 'Leave was already decided or is outside your department.')
+    return redirect('leave_list')
+
+@login_required
+@group_required('ADMIN', 'MANAGER')
+@write_transaction
+def leave_bulk_decide(request):
+    if request.method != 'POST':
+        return redirect('leave_list')
+    status = request.POST.get('action')
+    if status not in ('APPROVED', 'REJECTED'):
+        messages.error(request, 'Choose approve or reject.')
+        return redirect('leave_list')
+
+    qs = Leave.objects.all()
+    if request.POST.get('all_pending'):
+        # every pending leave in scope, optionally only those touching a date window
+        # a mistyped bound must not widen the decision to every pending leave
+        if dates.invalid(request.POST, 'start', 'end'):
+            messages.error(request, 'Enter valid dates for the window.')
+            return redirect('leave_list')
+        start = dates.param(request.POST, 'start')
+        end = dates.param(request.POST, 'end')
+        if start:
+            qs = qs.filter(end_date__gte=start)
+        if end:
+            qs = qs.filter(start_date__lte=end)
+    else:
+        ids = [int(i) for i in request.POST.getlist('ids') if i.isdigit()]
+        if not ids:
+            messages.warning(request, 'No leave requests selected.')
+            return redirect('leave_list')
+        qs = qs.filter(pk__in=ids)
+
+    changed = decide_leaves(qs, status, request.user, _decision_department(request))
+    verb = 'approved' if status == 'APPROVED' else 'rejected'
+    messages.success(request, f'{changed} leave request{"s" if changed != 1 else ""} {verb}.')
     return redirect('leave_list')
 
 
@@ -285,15 +489,15 @@ class RoleBasedLoginView(LoginView):
     redirect_authenticated_user = True
 
     def get_success_url(self):
-        user = self.request.user
+        role = roles_for_user(self.request.user).role
 
-        if user.is_superuser or user.groups.filter(name='ADMIN').exists():
+        if role == 'ADMIN':
             return reverse_lazy('dashboard')   # full access dashboard
 
-        elif user.groups.filter(name='MANAGER').exists():
+        elif role == 'MANAGER':
             return reverse_lazy('employee_list')  # e.g. go to employees page
 
-        elif user.groups.filter(name='EMPLOYEE').exists():
+        elif role == 'EMPLOYEE':
             return reverse_lazy('my_attendance')  # e.g. go to their own attendance
 
         # fallback
@@ -304,5 +508,166 @@ from .models import UserSession
 @login_required
 @group_required('ADMIN', 'MANAGER')
 def session_list(request):
-    sessions = UserSession.objects.select_related('user').order_by('-login_time')
-    return render(request, 'session_list.html', {'sessions': sessions})
+    sessions = UserSession.objects.select_related('user')
+    page = keyset_paginate(request, sessions, ['-login_time'])
+    prime_roles([s.user for s in page])
+    return render(request, 'session_list.html', {'sessions': page, 'page': page})
+
+
+# --- Exports ---
+@login_required
+@group_required('ADMIN', 'MANAGER')
+def export_csv(request, kind):
+    if kind not in EXPORTS:
+        raise Http404
+    bad = dates.invalid(request.GET, 'start', 'end')
+    if bad:
+        return HttpResponseBadRequest(f"Invalid date: {', '.join(bad)}", content_type='text/plain')
+    start = dates.param(request.GET, 'start')
+    end = dates.param(request.GET, 'end')
+    roles = get_roles(request)
+    if roles.is_manager:
+        # Managers only ever export their own department
+        dept_id = roles.scope_department_id
+        if not dept_id:
+            raise PermissionDenied
+    else:
+        dept_id = request.GET.get('department')
+        dept_id = int(dept_id) if dept_id and dept_id.isdigit() else None
+    rows = export_rows(kind, start, end, dept_id)
+    response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+    stamp = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{stamp}.csv"'
+    return response
+
+
+# --- Reports ---
+@async_login_required
+@group_required('ADMIN', 'MANAGER')
+async def attendance_report(request):
+    roles = await sync_to_async(get_roles)(request)
+    if roles.is_manager:
+        dept_id = roles.scope_department_id
+    else:
+        dept_id = request.GET.get('department')
+        dept_id = int(dept_id) if dept_id and dept_id.isdigit() else None
+
+    today = timezone.localdate()
+    month = dates.parse((request.GET.get('month') or '') + '-01') or today.replace(day=1)
+    matrix = await aattendance_matrix(dept_id, month.year, month.month) if dept_id else None
+
+    if request.GET.get('format') == 'json':
+        if matrix is None:
+            return JsonResponse({'error': 'department is required'}, status=400)
+        return JsonResponse({'department': dept_id, **matrix.as_dict()})
+
+    return await sync_to_async(render)(request, 'attendance_report.html', {
+        'matrix': matrix,
+        'month': month,
+        'dept_id': dept_id,
+        'departments': None if roles.is_manager else Department.objects.all(),
+    })
+
+
+@login_required
+@group_required('ADMIN', 'MANAGER')
+def session_report(request):
+    roles = get_roles(request)
+    if roles.is_manager:
+        dept_id = roles.scope_department_id
+        if not dept_id:
+            raise PermissionDenied
+    else:
+        dept_id = request.GET.get('department')
+        dept_id = int(dept_id) if dept_id and dept_id.isdigit() else None
+
+    # whole weeks, Monday to Sunday; the last four by default
+    today = timezone.localdate()
+    end = dates.param(request.GET, 'end', today)
+    end += timedelta(days=6 - end.weekday())
+    start = dates.param(request.GET, 'start', end - timedelta(weeks=4))
+    start = max(start, end - timedelta(weeks=53))
+    start -= timedelta(days=start.weekday())
+    weeks = [start + timedelta(weeks=i) for i in range((end - start).days // 7 + 1)]
+
+    employees = {}
+    for r in rollups.weekly_hours(start, end, dept_id):
+        name = f"{r['user__first_name']} {r['user__last_name']}".strip() or r['user__username']
+        row = employees.setdefault(r['user_id'], {'name': name, 'weeks': {}, 'seconds': 0, 'sessions': 0})
+        row['weeks'][r['week']] = r['seconds']
+        row['seconds'] += r['seconds']
+        row['sessions'] += r['sessions']
+    rows = [
+        (e['name'], [e['weeks'].get(w) for w in weeks], e['seconds'], e['sessions'])
+        for e in sorted(employees.values(), key=lambda e: e['name'].lower())
+    ]
+
+    return render(request, 'session_report.html', {
+        'rows': rows,
+        'weeks': weeks,
+        'start': start,
+        'end': end,
+        'dept_id': dept_id,
+        'departments': None if roles.is_manager else Department.objects.all(),
+    })
+
+
+# --- JSON API ---
+@api_endpoint
+@require_GET
+def api_list(request, resource):
+    if resource not in RESOURCES:
+        raise ApiError(f'unknown resource {resource!r}', status=404)
+    return json_response(list_page(request, RESOURCES[resource]))
+
+@api_endpoint
+@require_POST
+@write_transaction
+def api_leave_apply(request):
+    form = LeaveForm(read_json(request), employee=request.user)
+    if not form.is_valid():
+        return json_response({'errors': {k: [str(e) for e in v] for k, v in form.errors.items()}}, status=400)
+    leave = form.save(commit=False)
+    leave.employee = request.user
+    leave.save()
+    return json_response({'id': leave.pk, 'status': leave.status}, status=201)
+
+@api_endpoint
+@group_required('ADMIN', 'MANAGER')
+@require_POST
+@write_transaction
+def api_attendance_bulk(request):
+    rows, rejected = attendance_records(request, read_json(request).get('records'))
+    if rows:
+        Attendance.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['employee', 'date'],
+            update_fields=['status', 'remarks', 'created_by', 'updated_at', 'department'],
+        )
+        counters.touch('user', 'attendance', *(r.employee_id for r in rows))
+        bump_fragments('attendance')
+    return json_response({'saved': len(rows), 'rejected': rejected})
+
+@api_endpoint
+@group_required('ADMIN', 'MANAGER')
+@require_POST
+@write_transaction
+def api_leave_decide(request):
+    data = read_json(request)
+    status = str(data.get('status') or '').upper()
+    if status not in ('APPROVED', 'REJECTED'):
+        raise ApiError("'status' must be APPROVED or REJECTED")
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ApiError("'ids' must be a non-empty list of leave ids")
+    changed = decide_leaves(Leave.objects.filter(pk__in=ids), status, request.user,
+                            _decision_department(request))
+    return json_response({'changed': changed})
+
+@api_endpoint
+@group_required('ADMIN', 'MANAGER')
+@require_GET
+@cache_control(private=True, max_age=settings.EMS_AUTOCOMPLETE_MAX_AGE)
+def autocomplete(request, kind):
+    if kind not in autocomplete_sources.SOURCES:
+        raise ApiError(f'unknown lookup {kind!r}', status=404)
+    return json_response({'results': autocomplete_sources.lookup(request, kind)})
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',  # inactive unless EMS_PROFILING
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,11 +52,33 @@ WSGI_APPLICATION = 'ems.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # stock sqlite3 backend plus OPTIONS['transaction_mode'], see core/backends/sqlite3
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # keep connections open between requests (seconds); 0 closes after each request
+        'CONN_MAX_AGE': int(os.environ.get('EMS_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # seconds the driver waits on a locked database before raising
+            'timeout': 20,
+            # atomic() blocks take the write lock at BEGIN, so concurrent
+            # writers wait their turn instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Applied to every new SQLite connection (core.db.configure_sqlite).
+# WAL lets readers run alongside the single writer; set to {} to disable.
+EMS_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -76,6 +99,68 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Shared by all worker processes on the host so signal-driven invalidation
+# is seen by every worker. Point this at
+# memcached/redis when running on more than one machine.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
+
+# List pagination (keyset/cursor based; ?page_size= may override up to the max)
+EMS_PAGE_SIZE = 50
+EMS_MAX_PAGE_SIZE = 500
+
+# Seconds a user's resolved groups/department stay in the cache (invalidated by signals)
+EMS_ROLE_CACHE_TIMEOUT = 300
+
+# Rows fetched per database round-trip when streaming CSV exports
+EMS_EXPORT_CHUNK_SIZE = 2000
+
+# Profile photo thumbnails (square, px), rendered by the build_thumbnails job
+EMS_THUMBNAIL_SIZES = (48, 128)
+
+# Max age (seconds) of cached table fragments; writes invalidate them sooner
+EMS_FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Threads (each with its own connection) that async views use to run independent queries concurrently
+EMS_ASYNC_QUERY_WORKERS = 4
+
+# Whole months of attendance kept in the hot table; archive_attendance moves older rows out
+EMS_ATTENDANCE_RETENTION_MONTHS = 12
+
+# Request profiling (core.middleware): Server-Timing headers plus a JSON-lines log
+EMS_PROFILING = os.environ.get('EMS_PROFILING') == '1'
+EMS_PROFILE_LOG = os.environ.get('EMS_PROFILE_LOG', BASE_DIR / 'profile.log')
+EMS_PROFILE_SLOW_MS = 500
+
+# Per-page latency/query budgets checked by `manage.py bench_views`
+EMS_BENCH_BUDGETS = BASE_DIR / 'bench_budgets.json'
+
+# Lazy form selects (core.autocomplete): results per lookup and browser cache seconds
+EMS_AUTOCOMPLETE_LIMIT = 20
+EMS_AUTOCOMPLETE_MAX_AGE = 60
+
+# Login/logout session rows (core.session_log) are buffered and written in batches by a background thread
+EMS_SESSION_BUFFER = True
+EMS_SESSION_FLUSH_SECONDS = 1.0
+EMS_SESSION_BATCH_SIZE = 500
+
+# Background jobs (core.jobs, `manage.py run_worker`): pool size, poll interval, default timeout and
+# first retry delay (doubling per attempt), seconds without a worker heartbeat (sent every 30s) before a RUNNING
+# job counts as orphaned, and days DONE jobs are kept
+EMS_JOB_WORKERS = 2
+EMS_JOB_POLL_SECONDS = 1.0
+EMS_JOB_TIMEOUT = 900
+EMS_JOB_RETRY_DELAY = 30
+EMS_JOB_STALE_SECONDS = 300
+EMS_JOB_KEEP_DAYS = 7
+
+# Weekdays (Monday = 0) on which close_attendance_day expects attendance
+EMS_WORKING_DAYS = (0, 1, 2, 3, 4)